@@ -0,0 +1,19 @@
+"""ASGI entry point, e.g. ``daphne crusaders_project.asgi:application``.
+
+Serving through ASGI switches the read-only pages to the async views in
+``main.async_views`` unless ASYNC_VIEWS is set explicitly. They are marked
+``non_atomic_requests``, so this works with ATOMIC_REQUESTS in production.
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crusaders_project.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+
+application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.PRECOMPILE_TEMPLATES:
+    from main.templating import compile_templates
+    compile_templates()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 
@@ -26,19 +27,29 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'main',
     'django.contrib.sites',
+    'django.contrib.sitemaps',
 ]
 
+# Serverless cold-start mode (on by default on Vercel): the site function boots without
+# allauth and its Google provider (which pull in requests/jwt). vercel.json routes the
+# auth URLs (/accounts/, /login/, /signup/, /admin/) to crusaders_project/wsgi_auth.py,
+# which runs with the full app list. `manage.py importtime` measures the difference.
+COLD_START_MODE = os.environ.get('COLD_START_MODE', 'True' if os.environ.get('VERCEL') else 'False').lower() == 'true'
+
 # Third-party auth (django-allauth) - optional; install `django-allauth` to enable
-INSTALLED_APPS += [
-    'allauth',
-    'allauth.account',
-    'allauth.socialaccount',
-    'allauth.socialaccount.providers.google',
-]
+if not COLD_START_MODE:
+    INSTALLED_APPS += [
+        'allauth',
+        'allauth.account',
+        'allauth.socialaccount',
+        'allauth.socialaccount.providers.google',
+    ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # opt-in per-view timing (REQUEST_METRICS_ENABLED); removed at startup when off
+    'main.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -48,6 +59,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if COLD_START_MODE:
+    MIDDLEWARE.remove('allauth.account.middleware.AccountMiddleware')
 
 ROOT_URLCONF = 'crusaders_project.urls'
 
@@ -70,6 +83,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'crusaders_project.wsgi.application'
+ASGI_APPLICATION = 'crusaders_project.asgi.application'
+
+# Compile all templates when the WSGI/ASGI application loads (see main/templating.py)
+PRECOMPILE_TEMPLATES = os.environ.get('PRECOMPILE_TEMPLATES', 'False').lower() == 'true'
+
+# Serve the read-only pages with async views (set by crusaders_project/asgi.py)
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() == 'true'
 
 # Database
 # Prefer DATABASE_URL in production (e.g., Neon/Supabase/Render PostgreSQL).
@@ -136,8 +156,14 @@ AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
 )
+if COLD_START_MODE:
+    AUTHENTICATION_BACKENDS = ('django.contrib.auth.backends.ModelBackend',)
+# Record ModelBackend in the session for allauth logins too, so the site function
+# can load those users without importing allauth
+ACCOUNT_ADAPTER = 'main.adapters.AccountAdapter'
 
 LOGIN_REDIRECT_URL = '/'
+LOGOUT_REDIRECT_URL = '/'
 ACCOUNT_EMAIL_VERIFICATION = 'optional'
 ACCOUNT_AUTHENTICATION_METHOD = 'username_email'
 ACCOUNT_EMAIL_REQUIRED = True
@@ -165,5 +191,64 @@ ADMIN_ALLOWED_EMAILS = [
     # 'you@example.com',
 ]
 
+# One SQLite file shared by every process on the host (gunicorn workers, the image
+# worker, the mailer), so rate limits, metrics and cached pages are not per process
+# (see main/cache_backends.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'main.cache_backends.SQLiteCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'crusaders-cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '20000')),
+            'CULL_FREQUENCY': 4,
+        },
+    }
+}
+
+# Versioned page cache for the public views (see main/cache.py).
+# Entries are invalidated by content edits from any process: the versions they
+# are keyed on live in the database (CONTENT_VERSION_TTL below), and the entries
+# in the shared cache above. The timeout only ages out pages stored under
+# superseded versions.
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'True').lower() == 'true'
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+# Seconds each process may use the content versions it last read from the database
+# (main.ContentVersion, shared by every process and both Vercel functions)
+CONTENT_VERSION_TTL = float(os.environ.get('CONTENT_VERSION_TTL', '1'))
+# Shared query bundles (the home page data): rebuilt by one worker at a time after
+# BUNDLE_CACHE_TIMEOUT seconds while the others serve the previous copy
+BUNDLE_CACHE_TIMEOUT = 60 * 5
+BUNDLE_LOCK_TIMEOUT = 30
+BUNDLE_LOCK_WAIT = 2
+
+# Image derivatives are generated by `manage.py process_image_jobs`.
+# Set IMAGE_PROCESSING_ASYNC=False to generate them inside the request instead.
+IMAGE_PROCESSING_ASYNC = os.environ.get('IMAGE_PROCESSING_ASYNC', 'True').lower() == 'true'
+IMAGE_WORKER_CONCURRENCY = int(os.environ.get('IMAGE_WORKER_CONCURRENCY', '0')) or None
+
+# Per-view query/template timing shown on the studio dashboard
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'False').lower() == 'true'
+REQUEST_METRICS_WINDOW = 3600
+REQUEST_METRICS_FLUSH_INTERVAL = 10
+
+# Contact form notifications, sent by `manage.py send_contact_notifications`.
+# Set CONTACT_NOTIFY_ASYNC=False to send them right after the request instead.
+CONTACT_NOTIFY_EMAILS = [e for e in os.environ.get('CONTACT_NOTIFY_EMAILS', '').split(',') if e]
+CONTACT_NOTIFY_ASYNC = os.environ.get('CONTACT_NOTIFY_ASYNC', 'True').lower() == 'true'
+CONTACT_NOTIFY_MAX_ATTEMPTS = 5
+# Rows fetched per cursor round trip by the inbox CSV/NDJSON export
+CONTACT_EXPORT_CHUNK_SIZE = 2000
+
+# Token-bucket limits for form POSTs, per IP and per email: scope -> (burst, period seconds)
+# (see main/ratelimit.py). RATE_LIMIT_PROXY_HOPS is the number of trusted proxies in front of the
+# app; the client IP is read from that many entries from the right of X-Forwarded-For (0 = REMOTE_ADDR).
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', '0'))
+RATE_LIMITS = {
+    'contact': (5, 10 * 60),
+    'login': (10, 5 * 60),
+    'signup': (5, 60 * 60),
+}
+
 # Development email backend (prints emails to console)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from decouple import config, Csv
 
@@ -30,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.sitemaps',
     'main',
     'allauth',
     'allauth.account',
@@ -40,10 +42,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files in production
+    'main.middleware.RequestMetricsMiddleware',  # opt-in via REQUEST_METRICS_ENABLED
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'allauth.account.middleware.AccountMiddleware',  # required by allauth >= 0.56
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,7 +58,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -62,13 +65,27 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
-                'main.context_processors.add_page_context',
+                'main.context_processors.privileged_user',
+            ],
+            # compiled templates are kept in memory per process; see main/templating.py
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'crusaders_project.wsgi.application'
+ASGI_APPLICATION = 'crusaders_project.asgi.application'
+
+# Compile all templates when the WSGI/ASGI application loads instead of on first use
+PRECOMPILE_TEMPLATES = config('PRECOMPILE_TEMPLATES', default=True, cast=bool)
+
+# Serve the read-only pages with async views (set by crusaders_project/asgi.py)
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
 
 # Database - Use PostgreSQL in production
 DATABASES = {
@@ -235,13 +252,57 @@ ADMINS = [
 ]
 
 # Cache Configuration (optional - set up with Redis for better performance)
+# One SQLite file shared by all workers on the host, so cached pages, rate limits
+# and metrics are not per process (see main/cache_backends.py)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'main.cache_backends.SQLiteCache',
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'crusaders-cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+            'CULL_FREQUENCY': 4,
+        },
     }
 }
 
+# Versioned page cache for the public views (see main/cache.py)
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=True, cast=bool)
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+# Seconds each process may use the content versions it last read from the database
+CONTENT_VERSION_TTL = config('CONTENT_VERSION_TTL', default=1, cast=float)
+BUNDLE_CACHE_TIMEOUT = config('BUNDLE_CACHE_TIMEOUT', default=60 * 5, cast=int)
+BUNDLE_LOCK_TIMEOUT = 30
+BUNDLE_LOCK_WAIT = 2
+
+# Image processing queue (run `manage.py process_image_jobs` alongside the web process)
+IMAGE_PROCESSING_ASYNC = config('IMAGE_PROCESSING_ASYNC', default=True, cast=bool)
+IMAGE_WORKER_CONCURRENCY = config('IMAGE_WORKER_CONCURRENCY', default=0, cast=int) or None
+IMAGE_JOB_MAX_ATTEMPTS = config('IMAGE_JOB_MAX_ATTEMPTS', default=5, cast=int)
+
+# Per-view query/template timing shown on the studio dashboard
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=False, cast=bool)
+REQUEST_METRICS_WINDOW = config('REQUEST_METRICS_WINDOW', default=3600, cast=int)
+REQUEST_METRICS_FLUSH_INTERVAL = config('REQUEST_METRICS_FLUSH_INTERVAL', default=10, cast=int)
+
+# Contact form notifications (run `manage.py send_contact_notifications` alongside the web process);
+# defaults to the ADMINS addresses
+CONTACT_NOTIFY_EMAILS = config('CONTACT_NOTIFY_EMAILS', default='', cast=Csv())
+CONTACT_NOTIFY_ASYNC = config('CONTACT_NOTIFY_ASYNC', default=True, cast=bool)
+CONTACT_NOTIFY_MAX_ATTEMPTS = config('CONTACT_NOTIFY_MAX_ATTEMPTS', default=5, cast=int)
+# Rows fetched per cursor round trip by the inbox CSV/NDJSON export
+CONTACT_EXPORT_CHUNK_SIZE = config('CONTACT_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Token-bucket limits for form POSTs, per IP and per email (see main/ratelimit.py).
+# One platform proxy appends the client address to X-Forwarded-For; raise the hop count
+# if a CDN sits in front of it as well.
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+RATE_LIMIT_PROXY_HOPS = config('RATE_LIMIT_PROXY_HOPS', default=1, cast=int)
+RATE_LIMITS = {
+    'contact': (5, 10 * 60),
+    'login': (10, 5 * 60),
+    'signup': (5, 60 * 60),
+}
+
 # Message Storage
 MESSAGE_STORAGE = 'django.contrib.messages.storage.fallback.FallbackStorage'
 
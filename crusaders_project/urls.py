@@ -2,10 +2,20 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.auth.views import LogoutView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('accounts/', include('allauth.urls')),
+]
+
+if 'allauth' in settings.INSTALLED_APPS:
+    urlpatterns += [path('accounts/', include('allauth.urls'))]
+else:
+    # Cold-start mode: /accounts/ is served by the auth function (see wsgi_auth.py);
+    # keep the logout URL the layout reverses, at the path allauth uses.
+    urlpatterns += [path('accounts/logout/', LogoutView.as_view(), name='account_logout')]
+
+urlpatterns += [
     path('', include('main.urls')),
 ]
 
@@ -4,3 +4,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crusaders_project.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.PRECOMPILE_TEMPLATES:
+    from main.templating import compile_templates
+    compile_templates()
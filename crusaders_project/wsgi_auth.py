@@ -0,0 +1,16 @@
+"""WSGI entry point for the auth URLs when the site runs in cold-start mode.
+
+vercel.json routes /accounts/, /login/, /signup/ and /admin/ here, so only
+those requests load allauth and the Google provider; every other page is
+served by ``crusaders_project.wsgi`` with COLD_START_MODE on. The two
+functions share no memory, so admin edits made here reach the site
+function's page cache through the content versions in the database
+(see main/cache.py).
+"""
+import os
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crusaders_project.settings')
+os.environ['COLD_START_MODE'] = 'False'
+
+application = get_wsgi_application()
@@ -0,0 +1,12 @@
+from allauth.account.adapter import DefaultAccountAdapter
+
+SESSION_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class AccountAdapter(DefaultAccountAdapter):
+    def login(self, request, user):
+        # allauth's backend only adds authenticate(); get_user() is ModelBackend's.
+        # Storing ModelBackend keeps sessions valid in COLD_START_MODE, where
+        # allauth isn't installed (see crusaders_project/settings.py).
+        user.backend = SESSION_BACKEND
+        super().login(request, user)
@@ -2,23 +2,64 @@ from django.contrib import admin
 from .models import TeamMember, Project, Achievement, Participation, ContactMessage
 from .models import GallerySection, GalleryImage
 from django.utils.html import format_html
+from django.utils import timezone
 from .models import ProjectImage
+from .images import derivative_url
+from .jobs import latest_job, with_latest_job
+from .models import ImageJob, ContactNotification
+import zipfile
+from django import forms
+from django.core.exceptions import PermissionDenied
+from django.core.validators import FileExtensionValidator
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from .gallery_import import import_zip
+from . import inbox, inbox_search
+from django.contrib.admin.views.main import ORDER_VAR
+
+
+class ImageStatusMixin:
+    """Readonly column showing the derivative processing state of an upload."""
+    image_field = 'image'
+
+    def get_queryset(self, request):
+        return with_latest_job(super().get_queryset(request), self.image_field)
+
+    def processing_status(self, obj):
+        if not obj or not obj.pk or not getattr(obj, self.image_field):
+            return '-'
+        if hasattr(obj, 'latest_job_status'):
+            status, error = obj.latest_job_status, obj.latest_job_error
+        else:
+            job = latest_job(obj, self.image_field)
+            status, error = (job.status, job.last_error) if job else (None, '')
+        if status is None:
+            return '-'
+        label = dict(ImageJob.STATUS_CHOICES).get(status, status)
+        if status == ImageJob.STATUS_FAILED:
+            return f'{label}: {error[:80]}'
+        return label
+    processing_status.short_description = 'Processing'
 
 
 @admin.register(TeamMember)
-class TeamMemberAdmin(admin.ModelAdmin):
-    list_display = ('photo_tag', 'name', 'title', 'gender', 'created_at')
+class TeamMemberAdmin(ImageStatusMixin, admin.ModelAdmin):
+    image_field = 'photo'
+    list_display = ('photo_tag', 'name', 'title', 'gender', 'processing_status', 'created_at')
     search_fields = ('name', 'title', 'email', 'instagram', 'linkedin')
     list_filter = ('gender',)
-    readonly_fields = ()
+    readonly_fields = ('processing_status',)
     fieldsets = (
-        (None, {'fields': ('name', 'email', 'title', 'bio', 'gender', 'photo')}),
+        (None, {'fields': ('name', 'email', 'title', 'bio', 'gender', 'photo', 'processing_status')}),
         ('Social', {'fields': ('instagram', 'linkedin', 'x')}),
     )
 
     def photo_tag(self, obj):
         if obj.photo:
-            return format_html('<img src="{}" style="width:56px;height:56px;object-fit:cover;border-radius:8px" />', obj.photo.url)
+            return format_html('<img src="{}" style="width:56px;height:56px;object-fit:cover;border-radius:8px" />', derivative_url(obj.photo, 'avatar'))
         return '(no photo)'
     photo_tag.short_description = 'Photo'
 
@@ -30,10 +71,11 @@ class ProjectAdmin(admin.ModelAdmin):
     inlines = []
 
 
-class ProjectImageInline(admin.TabularInline):
+class ProjectImageInline(ImageStatusMixin, admin.TabularInline):
     model = ProjectImage
     extra = 1
-    fields = ('image', 'caption', 'order')
+    fields = ('image', 'caption', 'order', 'processing_status')
+    readonly_fields = ('processing_status',)
 
 # attach inline to ProjectAdmin dynamically
 ProjectAdmin.inlines = [ProjectImageInline]
@@ -56,12 +98,91 @@ class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'created_at', 'read')
     list_filter = ('read', 'created_at')
     search_fields = ('name', 'email', 'message')
+    actions = ['mark_read', 'mark_unread', 'export_csv', 'export_ndjson']
+
+    def get_urls(self):
+        return [
+            path('delete-range/', self.admin_site.admin_view(self.delete_range_view),
+                 name='main_contactmessage_delete_range'),
+        ] + super().get_urls()
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            results = inbox_search.search_messages(queryset, search_term)
+            if results is not None:
+                if ORDER_VAR not in request.GET:
+                    # best matches first, unless a column header was clicked
+                    results = results.order_by(f'-{inbox_search.RANK_ANNOTATION}', '-pk')
+                return results, False
+        return super().get_search_results(request, queryset, search_term)
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {'can_delete_range': self.has_delete_permission(request), **(extra_context or {})}
+        return super().changelist_view(request, extra_context)
+
+    def mark_read(self, request, queryset):
+        self.message_user(request, f'{inbox.set_read(queryset, True)} message(s) marked as read.')
+    mark_read.short_description = 'Mark selected messages as read'
+
+    def mark_unread(self, request, queryset):
+        self.message_user(request, f'{inbox.set_read(queryset, False)} message(s) marked as unread.')
+    mark_unread.short_description = 'Mark selected messages as unread'
+
+    def _export(self, lines, content_type, extension):
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        stamp = timezone.now().strftime('%Y%m%d-%H%M')
+        response['Content-Disposition'] = f'attachment; filename="contact-messages-{stamp}.{extension}"'
+        return response
+
+    def export_csv(self, request, queryset):
+        return self._export(inbox.csv_lines(queryset), 'text/csv; charset=utf-8', 'csv')
+    export_csv.short_description = 'Export selected messages as CSV'
+
+    def export_ndjson(self, request, queryset):
+        return self._export(inbox.ndjson_lines(queryset), 'application/x-ndjson', 'ndjson')
+    export_ndjson.short_description = 'Export selected messages as NDJSON'
+
+    def delete_range_view(self, request):
+        """Delete every message received between two dates, after a confirmation step."""
+        if not self.has_delete_permission(request):
+            raise PermissionDenied
+        form = DateRangeDeleteForm(request.POST or None)
+        count = None
+        if request.method == 'POST' and form.is_valid():
+            queryset = inbox.messages_between(
+                form.cleaned_data['start'], form.cleaned_data['end'], form.cleaned_data['read_only'],
+            )
+            if 'confirm' in request.POST:
+                deleted = inbox.delete_messages(queryset)
+                self.message_user(request, f'{deleted} message(s) deleted.')
+                return redirect('admin:main_contactmessage_changelist')
+            count = queryset.count()
+        return TemplateResponse(request, 'admin/main/contactmessage/delete_range.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Delete messages by date',
+            'form': form,
+            'count': count,
+            'opts': self.model._meta,
+        })
+
+
+class DateRangeDeleteForm(forms.Form):
+    start = forms.DateField(label='From', widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(label='To (inclusive)', widget=forms.DateInput(attrs={'type': 'date'}))
+    read_only = forms.BooleanField(label='Only messages marked as read', required=False)
 
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('start') and cleaned.get('end') and cleaned['start'] > cleaned['end']:
+            raise forms.ValidationError('The start date must not be after the end date.')
+        return cleaned
 
-class GalleryImageInline(admin.TabularInline):
+
+class GalleryImageInline(ImageStatusMixin, admin.TabularInline):
     model = GalleryImage
     extra = 1
-    fields = ('image', 'caption', 'order')
+    fields = ('image', 'caption', 'order', 'processing_status')
+    readonly_fields = ('processing_status',)
 
 
 @admin.register(GallerySection)
@@ -69,10 +190,108 @@ class GallerySectionAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'order', 'created_at')
     prepopulated_fields = {'slug': ('title',)}
     inlines = [GalleryImageInline]
+    actions = ['upload_zip']
+
+    def get_urls(self):
+        return [
+            path('<path:object_id>/upload-zip/', self.admin_site.admin_view(self.upload_zip_view),
+                 name='main_gallerysection_upload_zip'),
+        ] + super().get_urls()
+
+    def upload_zip(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, 'Select exactly one section to upload a ZIP into.', level='warning')
+            return None
+        return redirect('admin:main_gallerysection_upload_zip', queryset.get().pk)
+    upload_zip.short_description = 'Upload a ZIP of photos into the selected section'
+
+    def upload_zip_view(self, request, object_id):
+        """Upload form; the POST streams one progress line per extracted photo."""
+        section = get_object_or_404(GallerySection, pk=object_id)
+        if not self.has_change_permission(request, section):
+            raise PermissionDenied
+        form = ZipUploadForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            context = {**self.admin_site.each_context(request), 'section': section, 'opts': self.model._meta}
+            response = StreamingHttpResponse(self._zip_progress(section, form.cleaned_data['archive'], context),
+                                             content_type='text/html; charset=utf-8')
+            # don't let a proxy buffer the progress lines
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        return TemplateResponse(request, 'admin/main/gallerysection/upload_zip.html', {
+            **self.admin_site.each_context(request),
+            'title': f'Upload ZIP into {section}',
+            'section': section,
+            'form': form,
+            'opts': self.model._meta,
+        })
+
+    def _zip_progress(self, section, archive, context):
+        yield render_to_string('admin/main/gallerysection/upload_zip_start.html', context)
+        summary = {}
+        try:
+            for event in import_zip(section, archive):
+                if event[0] == 'saved':
+                    _, index, total, name = event
+                    yield format_html('<li>{} / {}: {}</li>\n', index, total, name)
+                elif event[0] == 'skipped':
+                    yield format_html('<li class="skipped">Skipped {} ({})</li>\n', event[1], event[2])
+                else:
+                    summary = {'created': event[1], 'skipped': event[2]}
+        except zipfile.BadZipFile:
+            summary = {'error': 'The file is not a valid ZIP archive.'}
+        except Exception as e:
+            summary = {'error': f'Import failed, nothing was saved: {e}'}
+        yield render_to_string('admin/main/gallerysection/upload_zip_end.html', {
+            **context, **summary,
+            'change_url': reverse('admin:main_gallerysection_change', args=[section.pk]),
+        })
+
+
+class ZipUploadForm(forms.Form):
+    archive = forms.FileField(
+        label='ZIP archive', validators=[FileExtensionValidator(['zip'])],
+        help_text='Images are added in file name order. A leading number ("03 - Opening_ceremony.jpg") '
+                  'sets the order; the rest of the name becomes the caption.',
+    )
 
 
 @admin.register(GalleryImage)
-class GalleryImageAdmin(admin.ModelAdmin):
-    list_display = ('__str__', 'section', 'order', 'created_at')
+class GalleryImageAdmin(ImageStatusMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'section', 'order', 'processing_status', 'created_at')
     list_filter = ('section',)
     search_fields = ('caption',)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'model_label', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'model_label')
+    search_fields = ('file_name',)
+    readonly_fields = ('model_label', 'object_id', 'field_name', 'file_name', 'attempts', 'last_error',
+                       'created_at', 'updated_at')
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=ImageJob.STATUS_RUNNING).update(
+            status=ImageJob.STATUS_PENDING, attempts=0, run_after=timezone.now(),
+        )
+        self.message_user(request, f'{updated} job(s) queued for another run.')
+    retry_jobs.short_description = 'Retry selected jobs'
+
+
+@admin.register(ContactNotification)
+class ContactNotificationAdmin(admin.ModelAdmin):
+    list_display = ('message', 'status', 'attempts', 'run_after', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('message__name', 'message__email')
+    list_select_related = ('message',)
+    readonly_fields = ('message', 'attempts', 'last_error', 'sent_at', 'created_at', 'updated_at')
+    actions = ['retry_notifications']
+
+    def retry_notifications(self, request, queryset):
+        updated = queryset.exclude(status__in=(ContactNotification.STATUS_SENDING, ContactNotification.STATUS_SENT)).update(
+            status=ContactNotification.STATUS_PENDING, attempts=0, run_after=timezone.now(),
+        )
+        self.message_user(request, f'{updated} notification(s) queued for another send.')
+    retry_notifications.short_description = 'Retry selected notifications'
@@ -9,6 +9,11 @@ class MainConfig(AppConfig):
     def ready(self):
         # Skip database initialization during app startup
         # This prevents errors during migrations and initial deploy
-        pass
+        # Register signal handlers that keep the page cache in sync
+        from . import signals  # noqa: F401
+        from . import checks  # noqa: F401
+        # Build the ADMIN_ALLOWED_EMAILS lookup set once at startup
+        from .roles import allowed_emails
+        allowed_emails()
 
 
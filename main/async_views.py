@@ -0,0 +1,164 @@
+"""Async versions of the read-only public pages, served under ASGI (daphne).
+
+Enabled with ``ASYNC_VIEWS`` (on by default in ``crusaders_project.asgi``).
+The pages query with Django's async ORM and share the querysets and context
+builders in ``main.views``, so both stacks render the same templates from the
+same queries.
+
+Independent queries are awaited together with ``asyncio.gather``: the four
+home page queries, and the two timeline sections and year list on the
+achievements page. While a page waits on the database, or on another
+worker's rebuild of the home bundle, the event loop keeps serving other
+connections, including 304s and cache hits from ``versioned_page``. Django
+runs async ORM calls on the request's thread-sensitive executor, so they
+still use the persistent connection (``CONN_MAX_AGE``) and the execute
+wrappers ``RequestMetricsMiddleware`` installs.
+
+Django refuses async views under ``ATOMIC_REQUESTS`` (set in production), so
+every view here is marked ``non_atomic_requests``; they only read.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.shortcuts import redirect, render
+
+from . import views
+from .cache import aread_through, mark_page_degraded, versioned_page
+from .models import (
+    Achievement, GalleryImage, GallerySection, Participation, Project, ProjectImage, TeamMember,
+)
+from .pagination import akeyset_page
+
+
+async def _render(request, template_name, context):
+    # context processors and the layout touch the session and request.user
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _evaluate(queryset):
+    """Async `views.evaluate`."""
+    try:
+        return await _list(queryset)
+    except:
+        mark_page_degraded()
+        return []
+
+
+async def _gather(*coroutines):
+    """Await `coroutines` together; a failed one yields None.
+
+    Failures are collected here rather than marked inside the coroutines:
+    each runs in its own task, whose context changes `mark_page_degraded`
+    would not see.
+    """
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    if any(isinstance(result, Exception) for result in results):
+        mark_page_degraded()
+    return [None if isinstance(result, Exception) else result for result in results]
+
+
+async def _build_home_bundle():
+    names, querysets = zip(*views.home_querysets().items())
+    # raises if a query fails, so the empty fallback is never cached
+    return dict(zip(names, await asyncio.gather(*(_list(qs) for qs in querysets))))
+
+
+async def home_bundle():
+    """Async `views.home_bundle`."""
+    try:
+        return await aread_through('home', views.HOME_MODELS, _build_home_bundle)
+    except:
+        mark_page_degraded()
+        return {name: [] for name in views.home_querysets()}
+
+
+@transaction.non_atomic_requests
+@versioned_page(*views.HOME_MODELS)
+async def home(request):
+    bundle = await home_bundle()
+    return await _render(request, 'index.html', views.home_context(request, **bundle))
+
+
+@transaction.non_atomic_requests
+@versioned_page(TeamMember)
+async def team(request):
+    team_members = await _evaluate(views.team_queryset())
+    return await _render(request, 'team.html', views.team_context(request, team_members))
+
+
+@transaction.non_atomic_requests
+@versioned_page(Project, ProjectImage)
+async def projects(request):
+    try:
+        page = await akeyset_page(views.projects_queryset(), views.PROJECT_ORDERING,
+                                  request.GET.get('after'), views.PROJECTS_PAGE_SIZE)
+    except:
+        mark_page_degraded()
+        page = ([], None)
+    return await _render(request, 'projects.html', views.projects_context(request, page))
+
+
+async def _timeline_section(queryset, cursor):
+    items, next_cursor = await akeyset_page(queryset, views.TIMELINE_ORDERING, cursor, views.TIMELINE_PAGE_SIZE)
+    return items, next_cursor, await queryset.acount()
+
+
+async def _timeline_years():
+    participation_years, achievement_years = views.timeline_years_querysets()
+    return set().union(*await asyncio.gather(_list(participation_years), _list(achievement_years)))
+
+
+@transaction.non_atomic_requests
+@versioned_page(Achievement, Participation)
+async def achievements(request):
+    achievement_qs, participation_qs = views.achievements_querysets(views.selected_year(request))
+    achievements_section, participations_section, years = await _gather(
+        _timeline_section(achievement_qs, request.GET.get('achievements_after')),
+        _timeline_section(participation_qs, request.GET.get('participations_after')),
+        _timeline_years(),
+    )
+    context = views.achievements_context(
+        request,
+        achievements_section or views.EMPTY_TIMELINE,
+        participations_section or views.EMPTY_TIMELINE,
+        views.NO_YEARS if years is None else years,
+    )
+    return await _render(request, 'achievements.html', context)
+
+
+@transaction.non_atomic_requests
+@versioned_page(GallerySection, GalleryImage)
+async def gallery_index(request):
+    sections = await _evaluate(views.gallery_sections())
+    return await _render(request, 'gallery_index.html', views.gallery_index_context(request, sections))
+
+
+@transaction.non_atomic_requests
+@versioned_page(Project, ProjectImage)
+async def gallery_projects(request):
+    projects = await _evaluate(views.gallery_projects_queryset())
+    return await _render(request, 'gallery_projects.html', views.gallery_projects_context(request, projects))
+
+
+@transaction.non_atomic_requests
+@versioned_page(GallerySection, GalleryImage)
+async def gallery_section(request, slug):
+    try:
+        section = await views.gallery_section_queryset(slug).afirst()
+        images, next_cursor = [], None
+        if section:
+            images, next_cursor = await akeyset_page(section.images.all(), views.GALLERY_IMAGE_ORDERING,
+                                                     request.GET.get('cursor'), views.GALLERY_PAGE_SIZE)
+        section_page = (section, images, next_cursor)
+    except:
+        mark_page_degraded()
+        section_page = (None, [], None)
+    context = views.gallery_section_context(request, slug, section_page)
+    if context is None:
+        return redirect('main:gallery_index')
+    return await _render(request, 'gallery_section.html', context)
@@ -0,0 +1,351 @@
+"""Content-versioned page cache and conditional GET for the public views.
+
+Each model the public pages read from has a version counter stored in the
+``ContentVersion`` table, so every process sees it: gunicorn workers, the
+image worker, and both serverless functions on Vercel (see vercel.json).
+``post_save``/``post_delete`` signals (see ``main.signals``) bump the counter
+once the transaction commits, and cached pages are keyed by the versions of
+the models they depend on, so an admin edit makes the old entries unreachable
+instead of waiting for a TTL to run out. Each process reads the counters at
+most once every ``CONTENT_VERSION_TTL`` seconds (one query for all of them)
+and re-reads them right after its own bumps.
+
+The same versions, plus the time of the last bump, give every page an
+``ETag`` and ``Last-Modified`` header, so repeat visitors get a
+``304 Not Modified`` without a template render.
+
+Query results shared by several pages (the home page bundle) go through
+``read_through``, which rebuilds them in one worker at a time.
+
+A page rendered from fallback data (a query failed and the view showed an
+empty section instead) calls `mark_page_degraded` and is sent without
+validators and never stored, so one database hiccup is not cached for a day.
+"""
+import asyncio
+import hashlib
+import time
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import ContentVersion
+
+PAGE_KEY_PREFIX = 'page'
+BUNDLE_KEY_PREFIX = 'bundle'
+
+_release = None
+# (monotonic expiry, {label: (version, modified)}); see _content_versions
+_versions = (0.0, {})
+
+_page_degraded = ContextVar('page_degraded', default=False)
+
+
+def mark_page_degraded():
+    """Keep the page being rendered out of the page cache and without an ETag."""
+    _page_degraded.set(True)
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _fresh_version():
+    # Seed counters from the clock so a recreated row never hands out a
+    # version number that an older page entry was stored under.
+    return int(time.time() * 1000)
+
+
+def forget_content_versions():
+    """Make the next read load the content versions from the database again."""
+    global _versions
+    _versions = (0.0, {})
+
+
+def _load_versions():
+    return {label: (version, modified)
+            for label, version, modified in ContentVersion.objects.values_list('label', 'version', 'modified')}
+
+
+def _content_versions(labels):
+    """``{label: (version, modified)}``, read from the database at most every CONTENT_VERSION_TTL seconds."""
+    global _versions
+    expires, rows = _versions
+    if time.monotonic() < expires and all(label in rows for label in labels):
+        return rows
+    rows = _load_versions()
+    missing = [label for label in labels if label not in rows]
+    if missing:
+        now = int(time.time())
+        ContentVersion.objects.bulk_create(
+            [ContentVersion(label=label, version=_fresh_version(), modified=now) for label in missing],
+            ignore_conflicts=True,
+        )
+        rows = _load_versions()
+    _versions = (time.monotonic() + getattr(settings, 'CONTENT_VERSION_TTL', 1), rows)
+    return rows
+
+
+def get_content_version(model):
+    """Return the current content version for `model`, creating it if missing."""
+    return get_content_versions(model)[0]
+
+
+def get_content_versions(*models):
+    """Return a tuple with the content version of every model in `models`."""
+    return get_content_state(*models)[0]
+
+
+def get_content_state(*models):
+    """Return ``(versions, last_modified)`` for `models`.
+
+    `last_modified` is the Unix time of the newest edit to any of them, or None
+    for pages that do not depend on any model.
+    """
+    labels = [_label(m) for m in models]
+    rows = _content_versions(labels)
+    versions = tuple(rows[label][0] for label in labels)
+    modified = [rows[label][1] for label in labels]
+    return versions, max(modified) if modified else None
+
+
+def bump_content_version(model):
+    """Invalidate every cached page that depends on `model`."""
+    label = _label(model)
+    updated = ContentVersion.objects.filter(label=label).update(
+        version=F('version') + 1, modified=int(time.time()),
+    )
+    if not updated:
+        ContentVersion.objects.bulk_create(
+            [ContentVersion(label=label, version=_fresh_version(), modified=int(time.time()))],
+            ignore_conflicts=True,
+        )
+    # this process sees its own edits right away; the others within CONTENT_VERSION_TTL
+    forget_content_versions()
+    return get_content_version(model)
+
+
+def _bundle_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _bundle_keys(name):
+    key = f'{BUNDLE_KEY_PREFIX}:{name}'
+    return key, f'{key}:lock'
+
+
+def _store_bundle(key, versions, value):
+    fresh_until = time.time() + _bundle_setting('BUNDLE_CACHE_TIMEOUT', 60 * 5)
+    cache.set(key, (versions, fresh_until, value), _bundle_setting('PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+
+def read_through(name, models, build):
+    """Return ``build()``'s result from the cache, rebuilding it in one worker at a time.
+
+    The entry is tagged with the content versions of `models`. Once it is
+    older than BUNDLE_CACHE_TIMEOUT, the worker that takes the lock rebuilds
+    it while the others keep serving the stale copy. When the versions have
+    changed (an admin edit) or the entry is gone (a cache flush), the stale
+    copy is unusable, so the other workers wait up to BUNDLE_LOCK_WAIT seconds
+    for the rebuild before querying themselves.
+
+    If `build` raises, nothing is cached and the exception propagates.
+    """
+    key, lock_key = _bundle_keys(name)
+    versions = get_content_versions(*models)
+    entry = cache.get(key)
+    usable = entry is not None and entry[0] == versions
+    if usable and entry[1] > time.time():
+        return entry[2]
+
+    if not cache.add(lock_key, 1, _bundle_setting('BUNDLE_LOCK_TIMEOUT', 30)):
+        if usable:
+            return entry[2]
+        deadline = time.monotonic() + _bundle_setting('BUNDLE_LOCK_WAIT', 2)
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None and entry[0] == versions:
+                return entry[2]
+        return build()
+
+    try:
+        value = build()
+        _store_bundle(key, versions, value)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+async def aread_through(name, models, build):
+    """`read_through` for async views: `build` is a coroutine function.
+
+    Waiting for another worker's rebuild sleeps on the event loop instead of
+    holding a thread.
+    """
+    key, lock_key = _bundle_keys(name)
+    versions = await sync_to_async(get_content_versions)(*models)
+    entry = await cache.aget(key)
+    usable = entry is not None and entry[0] == versions
+    if usable and entry[1] > time.time():
+        return entry[2]
+
+    if not await cache.aadd(lock_key, 1, _bundle_setting('BUNDLE_LOCK_TIMEOUT', 30)):
+        if usable:
+            return entry[2]
+        deadline = time.monotonic() + _bundle_setting('BUNDLE_LOCK_WAIT', 2)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await cache.aget(key)
+            if entry is not None and entry[0] == versions:
+                return entry[2]
+        return await build()
+
+    try:
+        value = await build()
+        await sync_to_async(_store_bundle)(key, versions, value)
+        return value
+    finally:
+        await cache.adelete(lock_key)
+
+
+def release_token():
+    """Identify the deployed templates so a deploy changes every ETag.
+
+    Uses RELEASE_VERSION when set, otherwise a digest of the template files'
+    names and mtimes, computed once per process.
+    """
+    global _release
+    if _release is None:
+        _release = getattr(settings, 'RELEASE_VERSION', '') or ''
+        if not _release:
+            digest = hashlib.md5()
+            for directory in settings.TEMPLATES[0].get('DIRS', []):
+                for path in sorted(Path(directory).rglob('*.html')):
+                    digest.update(f'{path}:{path.stat().st_mtime_ns}'.encode('utf-8'))
+            _release = digest.hexdigest()[:12]
+    return _release
+
+
+def _is_anonymous(request):
+    user = getattr(request, 'user', None)
+    return not (user and user.is_authenticated)
+
+
+def _is_cacheable(request):
+    if not getattr(settings, 'PAGE_CACHE_ENABLED', True):
+        return False
+    return request.method == 'GET' and _is_anonymous(request)
+
+
+def page_etag(request, versions):
+    parts = [release_token(), request.get_full_path(), '.'.join(str(v) for v in versions)]
+    if not _is_anonymous(request):
+        # the layout shows the account menu and a CSRF-protected logout form
+        parts += [str(request.user.pk), request.META.get('CSRF_COOKIE', '')]
+    return '"%s"' % hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def page_cache_key(request, versions):
+    versions = '.'.join(str(v) for v in versions)
+    path = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+    return f'{PAGE_KEY_PREFIX}:{release_token()}:{path}:{versions}'
+
+
+def _finalize(request, response, etag, last_modified):
+    if response.status_code not in (200, 304):
+        return response
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # always revalidate, so edits show up on the next visit
+    if _is_anonymous(request):
+        patch_cache_control(response, no_cache=True)
+    else:
+        patch_cache_control(response, no_cache=True, private=True)
+    return response
+
+
+def _lookup(request, models):
+    """Return ``(response, state)``; `response` is set for a 304 or a cache hit."""
+    # WSGI threads reuse their context between requests
+    _page_degraded.set(False)
+    try:
+        versions, last_modified = get_content_state(*models)
+    except DatabaseError:
+        # the view falls back to empty sections; serve that uncached
+        mark_page_degraded()
+        return None, (None, None, None)
+    etag = page_etag(request, versions)
+    state = (etag, last_modified, None)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _finalize(request, not_modified, etag, last_modified), state
+
+    if not _is_cacheable(request):
+        return None, state
+
+    key = page_cache_key(request, versions)
+    state = (etag, last_modified, key)
+    cached = cache.get(key)
+    if cached is not None:
+        content, status, headers = cached
+        response = HttpResponse(content, status=status)
+        for name, value in headers:
+            response[name] = value
+        return _finalize(request, response, etag, last_modified), state
+    return None, state
+
+
+def _store(request, response, state):
+    etag, last_modified, key = state
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    if _page_degraded.get():
+        patch_cache_control(response, no_store=True)
+        return response
+    if key and response.status_code == 200 and not response.streaming and not response.cookies:
+        headers = list(response.items())
+        timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+        cache.set(key, (response.content, response.status_code, headers), timeout)
+    return _finalize(request, response, etag, last_modified)
+
+
+def versioned_page(*models):
+    """Serve a view with conditional GET and an anonymous page cache keyed on `models`.
+
+    Logged-in users always get a freshly rendered page, since the layout shows
+    their account menu and studio links, but they still get 304s. Works on
+    both plain and ``async def`` views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                response, state = await sync_to_async(_lookup)(request, models)
+                if response is not None:
+                    return response
+                response = await view(request, *args, **kwargs)
+                return await sync_to_async(_store)(request, response, state)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            response, state = _lookup(request, models)
+            if response is not None:
+                return response
+            return _store(request, view(request, *args, **kwargs), state)
+        return wrapper
+    return decorator
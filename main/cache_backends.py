@@ -0,0 +1,217 @@
+"""SQLite cache backend shared by every worker process on a host.
+
+``LocMemCache`` gives each gunicorn worker its own copy of the cache, so a
+content-version bump from an admin save only reaches the worker that handled
+it. This backend keeps entries in one SQLite file instead (WAL mode, so
+readers never block the writer), which every forked worker opens with its
+own connection.
+
+- ``incr``/``decr`` read and update the row inside one ``BEGIN IMMEDIATE``
+  transaction, which holds SQLite's write lock, so they are atomic across
+  processes. Integers are stored as plain SQLite integers; everything else
+  is pickled.
+- ``MAX_ENTRIES`` bounds the table; when it is exceeded, expired rows are
+  dropped first and then the least recently used ``1/CULL_FREQUENCY`` of the
+  rest. Access times are refreshed at most once a minute per key, so reads
+  rarely turn into writes.
+- Each process opens one connection, shared by its threads behind a lock.
+  ``close()`` (called by Django when a request finishes) closes it, and the
+  next request reconnects; the schema is only set up once per process.
+
+Configure with e.g.::
+
+    'BACKEND': 'main.cache_backends.SQLiteCache',
+    'LOCATION': '/var/tmp/crusaders-cache.sqlite3',
+    'OPTIONS': {'MAX_ENTRIES': 10000},
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# refresh an entry's LRU timestamp at most this often (seconds)
+TOUCH_INTERVAL = 60
+# check the table size every this many writes per process
+CULL_CHECK_INTERVAL = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+"""
+
+
+def _encode(value):
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value
+    return sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def _decode(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        # one connection per process, shared by its threads; the lock keeps one
+        # thread's BEGIN IMMEDIATE ... COMMIT from interleaving with another's statements
+        self._lock = threading.RLock()
+        self._connection = None
+        self._pid = None
+        self._schema_pid = None
+        self._writes = 0
+
+    @property
+    def _db(self):
+        # reopened after a fork or a close()
+        pid = os.getpid()
+        if self._connection is None or self._pid != pid:
+            db = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA synchronous=NORMAL')
+            if self._schema_pid != pid:
+                Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+                db.execute('PRAGMA journal_mode=WAL')
+                db.executescript(SCHEMA)
+                self._schema_pid = pid
+            self._connection, self._pid = db, pid
+        return self._connection
+
+    def _expiry(self, timeout):
+        # absolute expiry time, or None for no expiry
+        return self.get_backend_timeout(timeout)
+
+    def _write(self, sql, params):
+        """Run one write statement; returns the number of affected rows."""
+        with self._lock:
+            rows = self._db.execute(sql, params).rowcount
+            self._writes += 1
+            if self._writes % CULL_CHECK_INTERVAL == 0:
+                self._cull()
+        return rows
+
+    def _cull(self):
+        db = self._db
+        now = time.time()
+        db.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            if self._cull_frequency == 0:
+                db.execute('DELETE FROM cache')
+            else:
+                db.execute(
+                    'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                    (max(count - self._max_entries, count // self._cull_frequency),),
+                )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        return bool(self._write(
+            'INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, _encode(value), self._expiry(timeout), now, now),
+        ))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._get_many([key]).get(key, default)
+
+    def _get_many(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT key, value, expires, accessed FROM cache WHERE key IN ({placeholders})', keys,
+            ).fetchall()
+            found, stale = {}, []
+            for key, value, expires, accessed in rows:
+                if expires is not None and expires <= now:
+                    continue
+                found[key] = _decode(value)
+                if accessed < now - TOUCH_INTERVAL:
+                    stale.append(key)
+            if stale:
+                self._db.execute(
+                    f"UPDATE cache SET accessed = ? WHERE key IN ({','.join('?' * len(stale))})", [now, *stale],
+                )
+        return found
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        return {key_map[k]: v for k, v in self._get_many(list(key_map)).items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+            (key, _encode(value), self._expiry(timeout), time.time()),
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        return bool(self._write(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), now, key, now),
+        ))
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self._write('DELETE FROM cache WHERE key = ?', (key,)))
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._write(f"DELETE FROM cache WHERE key IN ({','.join('?' * len(keys))})", keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            return self._db.execute(
+                'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time()),
+            ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._lock:
+            db = self._db
+            # BEGIN IMMEDIATE takes the write lock, so read-modify-write is atomic across processes
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                row = db.execute(
+                    'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, now),
+                ).fetchone()
+                if row is None:
+                    raise ValueError(f"Key '{key}' not found")
+                value = _decode(row[0]) + delta
+                db.execute('UPDATE cache SET value = ?, accessed = ? WHERE key = ?', (_encode(value), now, key))
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        return value
+
+    def clear(self):
+        self._write('DELETE FROM cache', ())
+
+    def close(self, **kwargs):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
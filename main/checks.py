@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.utils.module_loading import import_string
+
+
+@register(Tags.templates)
+def check_context_processors(app_configs, **kwargs):
+    """Fail at startup when a TEMPLATES entry names a context processor that can't be imported."""
+    errors = []
+    for backend in settings.TEMPLATES:
+        for path in backend.get('OPTIONS', {}).get('context_processors', []):
+            try:
+                import_string(path)
+            except ImportError as e:
+                errors.append(Error(
+                    f'Context processor {path!r} could not be imported: {e}',
+                    hint='Fix or remove it in TEMPLATES["OPTIONS"]["context_processors"].',
+                    id='main.E001',
+                ))
+    return errors
@@ -0,0 +1,122 @@
+"""Bulk import of a ZIP archive of photos into a gallery section.
+
+Used by the "Upload ZIP" admin page on GallerySection. Django already spools
+large uploads to a temporary file, and ``zipfile`` only seeks through it.
+Each photo is verified with Pillow and then decompressed straight into
+storage in chunks, so neither the archive nor an image is ever held in
+memory. The ``GalleryImage`` rows are inserted with one ``bulk_create`` in a
+single transaction at the end.
+
+File names set caption and order: ``03 - Opening_ceremony.jpg`` becomes
+order 3 with the caption "Opening ceremony". Files without a number are
+placed after the section's existing images and the numbered ones, in
+archive order.
+"""
+import posixpath
+import re
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Max
+
+from .cache import bump_content_version
+from .jobs import enqueue_images
+from .models import GalleryImage
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif'}
+
+_NUMBERED = re.compile(r'^(\d+)[\s._-]*(.*)$')
+
+
+def parse_filename(name):
+    """Return ``(order, caption)`` for an archive member; order is None without a numeric prefix."""
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    order = None
+    match = _NUMBERED.match(stem)
+    if match:
+        order, stem = int(match.group(1)), match.group(2)
+    caption = re.sub(r'[\s_-]+', ' ', stem).strip()
+    return order, caption[:1].upper() + caption[1:]
+
+
+def image_members(archive):
+    """Split an archive's entries into ``(images, skipped)``, images sorted by path."""
+    max_size = getattr(settings, 'GALLERY_ZIP_MAX_IMAGE_SIZE', 25 * 1024 * 1024)
+    images, skipped = [], []
+    for info in archive.infolist():
+        base = posixpath.basename(info.filename)
+        if info.is_dir() or not base or base.startswith('.') or info.filename.startswith('__MACOSX/'):
+            continue
+        if posixpath.splitext(base)[1].lower() not in IMAGE_EXTENSIONS:
+            skipped.append((info.filename, 'not an image'))
+        elif info.file_size > max_size:
+            skipped.append((info.filename, 'too large'))
+        else:
+            images.append(info)
+    images.sort(key=lambda info: info.filename)
+    return images, skipped
+
+
+def is_valid_image(archive, info):
+    """Check an archive member with Pillow, streaming it, as ImageField's form validation would."""
+    from PIL import Image
+
+    try:
+        with archive.open(info) as stream, Image.open(stream) as image:
+            image.verify()
+    except Exception:
+        # not an image, truncated, or a decompression bomb
+        return False
+    return True
+
+
+def import_zip(section, fileobj):
+    """Extract the photos in `fileobj` into `section`, yielding progress as it goes.
+
+    Yields ``('skipped', name, reason)``, ``('saved', index, total, name)`` and
+    finally ``('done', created_count, skipped_count)``. Raises
+    ``zipfile.BadZipFile`` for an unreadable archive; stored files are removed
+    again if the database insert fails.
+    """
+    with zipfile.ZipFile(fileobj) as archive:
+        members, skipped = image_members(archive)
+        for name, reason in skipped:
+            yield ('skipped', name, reason)
+
+        parsed = [parse_filename(info.filename) for info in members]
+        existing = section.images.aggregate(m=Max('order'))['m'] or 0
+        next_order = max([existing, *(order for order, _ in parsed if order is not None)]) + 1
+        images = []
+        try:
+            for index, (info, (order, caption)) in enumerate(zip(members, parsed), 1):
+                if not is_valid_image(archive, info):
+                    skipped.append((info.filename, 'not a valid image'))
+                    yield ('skipped', info.filename, 'not a valid image')
+                    continue
+                if order is None:
+                    order, next_order = next_order, next_order + 1
+                image = GalleryImage(section=section, caption=caption[:250], order=order)
+                with archive.open(info) as stream:
+                    upload = File(stream, name=posixpath.basename(info.filename))
+                    upload.size = info.file_size
+                    image.image.save(upload.name, upload, save=False)
+                images.append(image)
+                yield ('saved', index, len(members), info.filename)
+
+            with transaction.atomic():
+                GalleryImage.objects.bulk_create(images)
+                # bulk_create skips post_save, so do what main.signals would have done
+                transaction.on_commit(lambda: _after_import(section, images))
+        except BaseException:
+            for image in images:
+                image.image.delete(save=False)
+            raise
+    yield ('done', len(images), len(skipped))
+
+
+def _after_import(section, images):
+    section.refresh_cover_image()
+    bump_content_version(GalleryImage)
+    enqueue_images(images, 'image')
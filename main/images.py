@@ -0,0 +1,218 @@
+"""Pillow-based derivatives for uploaded images.
+
+Derivatives are written through the field's storage right next to the
+original, so ``gallery/<slug>/photo.jpg`` gets ``gallery/<slug>/photo.tile.jpg``,
+``gallery/<slug>/photo.w640.jpg`` and so on. Names are derived from the
+original path alone, which lets templates build URLs without opening files.
+
+Every derivative is also encoded as AVIF and WebP (``photo.w640.avif``,
+``photo.w640.webp``) when the installed Pillow supports them, for use as
+``<picture>`` sources.
+
+Once a file's derivatives are written, the extensions they were encoded in
+are recorded on the image's row (its ``derivatives`` field, keyed by file
+name; see `main.jobs.record_derivatives`). URLs are built from that record,
+so rendering never asks the storage backend what exists.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+# Fixed-size crops, roughly 2x the CSS box they are shown in
+THUMBNAIL_SIZES = {
+    'avatar': (168, 168),   # admin list avatars (56px) and team cards (84px)
+    'mini': (240, 160),     # 120x80 mini project cards
+    'tile': (480, 480),     # gallery grid tiles and collection previews
+}
+
+# Widths for `srcset` ladders; originals are never upscaled
+SRCSET_WIDTHS = (320, 640, 960, 1280)
+
+# Pillow save() options per output format
+ENCODE_OPTIONS = {
+    'JPEG': {'quality': 82, 'progressive': True, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 80, 'method': 4},
+    'AVIF': {'quality': 60, 'speed': 6},
+}
+
+# (Pillow format, extension, MIME type), best compression first
+MODERN_FORMATS = (
+    ('AVIF', '.avif', 'image/avif'),
+    ('WEBP', '.webp', 'image/webp'),
+)
+
+# extension -> Pillow format; anything else is re-encoded as PNG
+FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+    '.webp': 'WEBP',
+}
+
+
+def derivative_name(name, label, ext=None):
+    """Return the storage name of the `label` derivative of `name`."""
+    root, orig_ext = posixpath.splitext(name)
+    if ext is None:
+        ext = orig_ext.lower() if orig_ext.lower() in FORMATS else '.png'
+    return f'{root}.{label}{ext}'
+
+
+def srcset_label(width):
+    return f'w{width}'
+
+
+def derivative_labels():
+    return list(THUMBNAIL_SIZES) + [srcset_label(w) for w in SRCSET_WIDTHS]
+
+
+def modern_formats():
+    """Return the entries of MODERN_FORMATS this Pillow build can encode."""
+    from PIL import features
+
+    return [f for f in MODERN_FORMATS if features.check(f[0].lower())]
+
+
+def _base_ext(name):
+    ext = posixpath.splitext(name)[1].lower()
+    return ext if ext in FORMATS else '.png'
+
+
+def encodings(name):
+    """Return ``(Pillow format, extension)`` for each encoding of `name`'s derivatives."""
+    base_ext = _base_ext(name)
+    return [(FORMATS.get(base_ext, 'PNG'), base_ext)] + [
+        (fmt, ext) for fmt, ext, _ in modern_formats() if ext != base_ext
+    ]
+
+
+def generated_exts(fieldfile):
+    """Return the extensions `fieldfile`'s derivatives were recorded in, if any."""
+    record = getattr(fieldfile.instance, 'derivatives', None) or {}
+    return record.get(fieldfile.name, ())
+
+
+def _open(fieldfile):
+    from PIL import Image, ImageOps
+
+    with fieldfile.storage.open(fieldfile.name, 'rb') as fh:
+        img = Image.open(fh)
+        img.load()
+    return ImageOps.exif_transpose(img)
+
+
+def _encode(img, fmt):
+    if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    elif img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = img.convert('RGBA')
+    buf = BytesIO()
+    img.save(buf, format=fmt, **ENCODE_OPTIONS.get(fmt, {}))
+    return buf.getvalue()
+
+
+def _write(storage, name, data):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(data))
+
+
+def _resized(img):
+    """Yield ``(label, image)`` for every thumbnail and srcset width of `img`."""
+    from PIL import Image, ImageOps
+
+    for label, size in THUMBNAIL_SIZES.items():
+        yield label, ImageOps.fit(img, size, Image.Resampling.LANCZOS)
+    for width in SRCSET_WIDTHS:
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            yield srcset_label(width), img.resize((width, height), Image.Resampling.LANCZOS)
+        else:
+            yield srcset_label(width), img
+
+
+def generate_derivatives(fieldfile, force=False):
+    """Write the thumbnails and srcset ladder for `fieldfile`.
+
+    Existing derivatives are kept unless `force` is set. Returns the list of
+    storage names that were written.
+    """
+    if not fieldfile:
+        return []
+    storage = fieldfile.storage
+    names = {
+        label: [(fmt, derivative_name(fieldfile.name, label, ext)) for fmt, ext in encodings(fieldfile.name)]
+        for label in derivative_labels()
+    }
+    if not force and all(storage.exists(n) for targets in names.values() for _, n in targets):
+        return []
+
+    img = _open(fieldfile)
+    written = []
+    for label, derived in _resized(img):
+        for fmt, name in names[label]:
+            if not force and storage.exists(name):
+                continue
+            _write(storage, name, _encode(derived, fmt))
+            written.append(name)
+    return written
+
+
+def safe_generate_derivatives(fieldfile, force=False):
+    """Like `generate_derivatives` but logs failures and returns None instead of raising."""
+    try:
+        return generate_derivatives(fieldfile, force=force)
+    except Exception:
+        logger.exception('Could not generate derivatives for %s', getattr(fieldfile, 'name', fieldfile))
+        return None
+
+
+def derivative_url(fieldfile, label):
+    """Return the URL of the `label` derivative, or the original URL if it is not generated yet."""
+    if not fieldfile:
+        return ''
+    if _base_ext(fieldfile.name) not in generated_exts(fieldfile):
+        return fieldfile.url
+    return fieldfile.storage.url(derivative_name(fieldfile.name, label))
+
+
+def _ladder(fieldfile, ext=None):
+    storage = fieldfile.storage
+    return ', '.join(
+        f'{storage.url(derivative_name(fieldfile.name, srcset_label(w), ext))} {w}w'
+        for w in SRCSET_WIDTHS
+    )
+
+
+def srcset(fieldfile):
+    """Return a `srcset` value for the width ladder of `fieldfile`, or '' if not generated yet."""
+    if not fieldfile or _base_ext(fieldfile.name) not in generated_exts(fieldfile):
+        return ''
+    return _ladder(fieldfile)
+
+
+def picture_sources(fieldfile, label=None):
+    """Return ``(mime, srcset)`` pairs for the modern encodings of `fieldfile`.
+
+    With a `label` the sources point at that single thumbnail, otherwise they
+    carry the full width ladder. Encodings that have not been generated yet are
+    left out, so the ``<img>`` fallback is used instead.
+    """
+    if not fieldfile:
+        return []
+    generated = generated_exts(fieldfile)
+    base_ext = _base_ext(fieldfile.name)
+    sources = []
+    for _, ext, mime in MODERN_FORMATS:
+        if ext == base_ext or ext not in generated:
+            continue
+        if label:
+            sources.append((mime, fieldfile.storage.url(derivative_name(fieldfile.name, label, ext))))
+        else:
+            sources.append((mime, _ladder(fieldfile, ext)))
+    return sources
@@ -0,0 +1,120 @@
+"""Full-text search over the contact inbox, used by ``ContactMessageAdmin``.
+
+Migration 0011 builds the index: an FTS5 table on SQLite and a weighted
+``tsvector`` column with a GIN index on PostgreSQL. Database triggers keep it
+in step with every insert, update and delete, including bulk ``update()``
+calls and raw SQL that never reach Django's signals. Name and email matches
+rank above message matches.
+
+Each word of the search term is matched as a prefix and all words must
+match, so ``jan exam`` finds "Jane" asking about an "examination". On other
+backends, or SQLite builds without FTS5, `search_messages` returns None and
+the admin keeps its ``icontains`` search.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import ContactMessage
+
+FTS_TABLE = 'main_contactmessage_fts'
+RANK_ANNOTATION = 'search_rank'
+
+# bm25 column weights for name, email and message
+SQLITE_WEIGHTS = (10.0, 10.0, 1.0)
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(term):
+    return _WORD.findall(term.lower())[:20]
+
+
+def backend(using='default'):
+    """'sqlite' or 'postgresql' when the full-text index exists on `using`, else None."""
+    connection = connections[using]
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return vendor
+    if vendor == 'sqlite':
+        cached = getattr(connection, '_contact_fts', None)
+        if cached is None:
+            with connection.cursor() as cursor:
+                cached = FTS_TABLE in connection.introspection.table_names(cursor)
+            # per connection, so a fresh test database is checked again
+            connection._contact_fts = cached
+        return vendor if cached else None
+    return None
+
+
+def _sqlite_query(words):
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _postgres_query(words):
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def search_messages(queryset, term):
+    """Filter `queryset` to messages matching `term`, annotated with `search_rank` (higher is better).
+
+    Returns None when no full-text index is available.
+    """
+    vendor = backend(queryset.db)
+    if vendor is None:
+        return None
+    words = search_terms(term)
+    if not words:
+        return queryset.none()
+    table = ContactMessage._meta.db_table
+    if vendor == 'sqlite':
+        query = _sqlite_query(words)
+        weights = ', '.join(str(w) for w in SQLITE_WEIGHTS)
+        # bm25() is negative, lower is better
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            [query], output_field=FloatField(),
+        )
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [query])
+        return queryset.filter(pk__in=matches).annotate(**{RANK_ANNOTATION: rank})
+    query = _postgres_query(words)
+    rank = RawSQL(
+        f"ts_rank_cd({table}.search_vector, to_tsquery('english', %s))", [query], output_field=FloatField(),
+    )
+    matches = RawSQL(
+        f"SELECT id FROM {table} WHERE search_vector @@ to_tsquery('english', %s)", [query],
+    )
+    return queryset.filter(pk__in=matches).annotate(**{RANK_ANNOTATION: rank})
+
+
+def rebuild_index(batch_size=1000, everything=False, using='default'):
+    """Index rows the triggers have not seen (or all rows); returns the number of rows processed.
+
+    SQLite rebuilds the whole FTS table in one statement. PostgreSQL fills
+    ``search_vector`` in batches so a large inbox is not locked at once.
+    """
+    vendor = backend(using)
+    table = ContactMessage._meta.db_table
+    with connections[using].cursor() as cursor:
+        if vendor == 'sqlite':
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            return cursor.fetchone()[0]
+        if vendor != 'postgresql':
+            return 0
+        done, last_id = 0, 0
+        while True:
+            cursor.execute(
+                f'UPDATE {table} SET search_vector = main_contactmessage_search_vector(name, email, message) '
+                f'WHERE id IN (SELECT id FROM {table} WHERE id > %s'
+                f"{'' if everything else ' AND search_vector IS NULL'} ORDER BY id LIMIT %s) RETURNING id",
+                [last_id, batch_size],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return done
+            done += len(ids)
+            last_id = max(ids)
@@ -0,0 +1,167 @@
+"""Database-backed queue for image derivative generation.
+
+Uploads only insert an ``ImageJob`` row during the admin save. The
+``process_image_jobs`` management command claims pending rows and runs the
+Pillow work in a process pool, retrying failures with exponential backoff.
+There is no broker: the table is the queue, and claims are made with a
+conditional UPDATE so several workers can share it safely.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.fields.files import FieldFile
+from django.apps import apps
+from django.utils import timezone
+
+from .cache import bump_content_version
+from .images import encodings, generate_derivatives, safe_generate_derivatives
+from .models import ImageJob
+
+
+def _label(obj):
+    return obj._meta.label_lower
+
+
+def processing_is_async():
+    return getattr(settings, 'IMAGE_PROCESSING_ASYNC', True)
+
+
+def enqueue_image(instance, field_name):
+    """Queue derivative generation for `instance.<field_name>`.
+
+    Saves that keep the same file (caption or order edits) do not queue a new
+    job. When `IMAGE_PROCESSING_ASYNC` is off the work runs inline instead.
+    """
+    fieldfile = getattr(instance, field_name)
+    if not fieldfile:
+        return None
+    if not processing_is_async():
+        if safe_generate_derivatives(fieldfile) is not None:
+            instance.derivatives = record_derivatives(type(instance), instance.pk, field_name, fieldfile.name)
+        return None
+    already_queued = ImageJob.objects.filter(
+        model_label=_label(instance), object_id=instance.pk,
+        field_name=field_name, file_name=fieldfile.name,
+    ).exclude(status=ImageJob.STATUS_FAILED).exists()
+    if already_queued:
+        return None
+    return ImageJob.objects.create(
+        model_label=_label(instance), object_id=instance.pk,
+        field_name=field_name, file_name=fieldfile.name,
+    )
+
+
+def enqueue_images(instances, field_name):
+    """Queue derivative generation for many new uploads with one INSERT (for bulk_create)."""
+    instances = [obj for obj in instances if getattr(obj, field_name)]
+    if not processing_is_async():
+        for obj in instances:
+            fieldfile = getattr(obj, field_name)
+            if safe_generate_derivatives(fieldfile) is not None:
+                obj.derivatives = record_derivatives(type(obj), obj.pk, field_name, fieldfile.name)
+        return []
+    return ImageJob.objects.bulk_create([
+        ImageJob(model_label=_label(obj), object_id=obj.pk, field_name=field_name,
+                 file_name=getattr(obj, field_name).name)
+        for obj in instances
+    ])
+
+
+def record_derivatives(model, pk, field_name, file_name):
+    """Note on the image's row that the derivatives of `file_name` are in storage.
+
+    Rows whose field has since moved on to another upload are left alone.
+    Returns the record written, for the caller's in-memory instance.
+    """
+    record = {file_name: [ext for _, ext in encodings(file_name)]}
+    model.objects.filter(pk=pk, **{field_name: file_name}).update(derivatives=record)
+    return record
+
+
+def latest_job(instance, field_name):
+    return ImageJob.objects.filter(
+        model_label=_label(instance), object_id=instance.pk, field_name=field_name,
+    ).order_by('-created_at', '-pk').first()
+
+
+def with_latest_job(queryset, field_name):
+    """Annotate `queryset` with ``latest_job_status`` and ``latest_job_error``.
+
+    The same job `latest_job` returns, fetched as correlated subqueries so a
+    list of rows costs one query rather than one per row.
+    """
+    jobs = ImageJob.objects.filter(
+        model_label=queryset.model._meta.label_lower, object_id=OuterRef('pk'), field_name=field_name,
+    ).order_by('-created_at', '-pk')
+    return queryset.annotate(
+        latest_job_status=Subquery(jobs.values('status')[:1]),
+        latest_job_error=Subquery(jobs.values('last_error')[:1]),
+    )
+
+
+def claim_jobs(limit):
+    """Mark up to `limit` due jobs as running and return them."""
+    now = timezone.now()
+    candidates = ImageJob.objects.filter(
+        status=ImageJob.STATUS_PENDING, run_after__lte=now,
+    ).order_by('run_after', 'pk').values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in list(candidates):
+        updated = ImageJob.objects.filter(pk=pk, status=ImageJob.STATUS_PENDING).update(
+            status=ImageJob.STATUS_RUNNING, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if updated:
+            claimed.append(ImageJob.objects.get(pk=pk))
+    return claimed
+
+
+def release_jobs(jobs):
+    """Put claimed jobs that never started back in the queue, without using up an attempt."""
+    return ImageJob.objects.filter(pk__in=[job.pk for job in jobs], status=ImageJob.STATUS_RUNNING).update(
+        status=ImageJob.STATUS_PENDING, attempts=F('attempts') - 1, updated_at=timezone.now(),
+    )
+
+
+def reset_stale_jobs(older_than):
+    """Return jobs stuck in `running` (e.g. after a worker crash) to the queue."""
+    cutoff = timezone.now() - older_than
+    return ImageJob.objects.filter(status=ImageJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=ImageJob.STATUS_PENDING, run_after=timezone.now(),
+    )
+
+
+def process_file(model_label, field_name, file_name, force=False):
+    """Generate derivatives for one stored file. Runs inside the worker pool.
+
+    Only the storage is touched, not the database, so child processes never
+    need a connection of their own.
+    """
+    field = apps.get_model(model_label)._meta.get_field(field_name)
+    return generate_derivatives(FieldFile(None, field, file_name), force=force)
+
+
+def mark_done(job):
+    ImageJob.objects.filter(pk=job.pk).update(
+        status=ImageJob.STATUS_DONE, last_error='', updated_at=timezone.now(),
+    )
+    model = apps.get_model(job.model_label)
+    record_derivatives(model, job.object_id, job.field_name, job.file_name)
+    # cached pages and fragments still point at the original upload
+    bump_content_version(model)
+
+
+def mark_failed(job, exc, max_attempts, backoff_seconds):
+    """Reschedule `job` with exponential backoff, or fail it for good."""
+    error = ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+    now = timezone.now()
+    if job.attempts < max_attempts:
+        delay = timedelta(seconds=backoff_seconds * 2 ** (job.attempts - 1))
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.STATUS_PENDING, last_error=error, run_after=now + delay, updated_at=now,
+        )
+    else:
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.STATUS_FAILED, last_error=error, updated_at=now,
+        )
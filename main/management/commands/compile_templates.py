@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.templating import compile_templates
+
+
+class Command(BaseCommand):
+    help = 'Compile every template under templates/ to catch syntax errors before serving'
+
+    def handle(self, *args, **options):
+        compiled, errors = compile_templates()
+        for name, error in errors.items():
+            self.stdout.write(self.style.ERROR(f'✗ {name}: {error}'))
+        if errors:
+            raise CommandError(f'{len(errors)} template(s) failed to compile')
+        self.stdout.write(self.style.SUCCESS(f'✓ Compiled {len(compiled)} template(s)'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from main.images import generate_derivatives
+from main.jobs import record_derivatives
+from main.models import TeamMember, GalleryImage, ProjectImage
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and srcset widths for existing uploaded images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that already exist')
+
+    def handle(self, *args, **options):
+        sources = (
+            (GalleryImage.objects.all(), 'image'),
+            (ProjectImage.objects.all(), 'image'),
+            (TeamMember.objects.exclude(photo=''), 'photo'),
+        )
+        total = 0
+        for queryset, field in sources:
+            for obj in queryset.iterator():
+                fieldfile = getattr(obj, field)
+                if not fieldfile:
+                    continue
+                try:
+                    written = generate_derivatives(fieldfile, force=options['force'])
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f'Skipped {fieldfile.name}: {e}'))
+                    continue
+                record_derivatives(type(obj), obj.pk, field, fieldfile.name)
+                total += len(written)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {total} derivative file(s)'))
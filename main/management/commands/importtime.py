@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_importtime(output):
+    """Parse ``python -X importtime`` output into ``[(module, self_us, cumulative_us)]``."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or line.rstrip().endswith('imported package'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report per-module import time for booting the site, to track cold-start regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='crusaders_project.wsgi',
+                            help='Module to import in a fresh interpreter')
+        parser.add_argument('--group', choices=('module', 'package'), default='package',
+                            help='Report single modules by cumulative time, or top-level packages by total self time')
+        parser.add_argument('--limit', type=int, default=25,
+                            help='Number of rows to show')
+        parser.add_argument('--cold-start', action='store_true',
+                            help='Import with COLD_START_MODE=True, as the serverless site function does')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('DJANGO_SETTINGS_MODULE', 'crusaders_project.settings'))
+        if options['cold_start']:
+            env['COLD_START_MODE'] = 'True'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {options['module']}"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Importing {options['module']} failed:\n{result.stderr[-2000:]}")
+
+        rows = parse_importtime(result.stderr)
+        total = next((cumulative for name, _, cumulative in rows if name == options['module']), 0)
+        if options['group'] == 'package':
+            totals = defaultdict(int)
+            for name, self_us, _ in rows:
+                totals[name.split('.')[0]] += self_us
+            ranked = sorted(totals.items(), key=lambda item: -item[1])
+        else:
+            ranked = sorted(((name, cumulative) for name, _, cumulative in rows), key=lambda item: -item[1])
+
+        self.stdout.write(f"Importing {options['module']} took {total / 1000:.1f} ms ({len(rows)} modules)")
+        for name, us in ranked[:options['limit']]:
+            self.stdout.write(f'{us / 1000:9.1f} ms  {name}')
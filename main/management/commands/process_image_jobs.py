@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from main.jobs import claim_jobs, mark_done, mark_failed, process_file, release_jobs, reset_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run the image processing worker: generate thumbnails and modern formats for queued uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int,
+                            default=getattr(settings, 'IMAGE_WORKER_CONCURRENCY', None) or os.cpu_count() or 1,
+                            help='Number of worker processes for Pillow work')
+        parser.add_argument('--max-attempts', type=int,
+                            default=getattr(settings, 'IMAGE_JOB_MAX_ATTEMPTS', 5),
+                            help='Attempts before a job is marked failed')
+        parser.add_argument('--backoff', type=float, default=30,
+                            help='Base retry delay in seconds, doubled on each attempt')
+        parser.add_argument('--poll-interval', type=float, default=2,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=15,
+                            help='Minutes after which a running job is considered abandoned')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is drained instead of polling forever')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        reset = reset_stale_jobs(timedelta(minutes=options['stale_after']))
+        if reset:
+            self.stdout.write(self.style.WARNING(f'Requeued {reset} abandoned job(s)'))
+
+        self.stdout.write(f'Processing image jobs with {concurrency} worker process(es)')
+        running = {}
+        pool = self.start_pool(concurrency)
+        try:
+            while True:
+                free = concurrency - len(running)
+                if free > 0:
+                    claimed = claim_jobs(free)
+                    for i, job in enumerate(claimed):
+                        try:
+                            future = pool.submit(process_file, job.model_label, job.field_name, job.file_name)
+                        except BrokenProcessPool:
+                            # a child died since the last wait(); these jobs never ran
+                            release_jobs(claimed[i:])
+                            pool = self.restart_pool(pool, concurrency)
+                            break
+                        running[future] = job
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        written = future.result()
+                    except Exception as e:
+                        # BrokenProcessPool (a child was killed, e.g. OOM) fails every running job;
+                        # they retry with backoff, so an image that crashes Pillow ends up failed
+                        broken = broken or isinstance(e, BrokenProcessPool)
+                        mark_failed(job, e, options['max_attempts'], options['backoff'])
+                        self.stdout.write(self.style.WARNING(f'✗ {job.file_name}: {e}'))
+                    else:
+                        mark_done(job)
+                        self.stdout.write(self.style.SUCCESS(f'✓ {job.file_name} ({len(written)} files)'))
+                if broken:
+                    pool = self.restart_pool(pool, concurrency)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker')
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def start_pool(self, concurrency):
+        # Children are forked from this process; don't let them share its DB socket
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=concurrency)
+
+    def restart_pool(self, pool, concurrency):
+        self.stdout.write(self.style.WARNING('A worker process died; restarting the pool'))
+        pool.shutdown(wait=False, cancel_futures=True)
+        return self.start_pool(concurrency)
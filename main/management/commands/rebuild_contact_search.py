@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from main.inbox_search import backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Build the contact inbox full-text index for existing messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows updated per statement on PostgreSQL')
+        parser.add_argument('--all', action='store_true',
+                            help='Reindex every message, not only those missing from the index')
+
+    def handle(self, *args, **options):
+        vendor = backend()
+        if vendor is None:
+            self.stdout.write(self.style.WARNING(
+                'No full-text index on this database (run migrate; needs PostgreSQL or SQLite with FTS5)'
+            ))
+            return
+        count = rebuild_index(batch_size=max(1, options['batch_size']), everything=options['all'])
+        self.stdout.write(self.style.SUCCESS(f'✓ indexed {count} message(s) ({vendor})'))
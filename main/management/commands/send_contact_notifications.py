@@ -0,0 +1,50 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.notifications import reset_stale_notifications, send_notifications
+
+
+class Command(BaseCommand):
+    help = 'Run the contact notification worker: email admins about new contact messages in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Messages sent per SMTP connection')
+        parser.add_argument('--max-attempts', type=int,
+                            default=getattr(settings, 'CONTACT_NOTIFY_MAX_ATTEMPTS', 5),
+                            help='Attempts before a notification is marked failed')
+        parser.add_argument('--backoff', type=float, default=60,
+                            help='Base retry delay in seconds, doubled on each attempt')
+        parser.add_argument('--poll-interval', type=float, default=5,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=15,
+                            help='Minutes after which a sending notification is considered abandoned')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is drained instead of polling forever')
+
+    def handle(self, *args, **options):
+        reset = reset_stale_notifications(timedelta(minutes=options['stale_after']))
+        if reset:
+            self.stdout.write(self.style.WARNING(f'Requeued {reset} abandoned notification(s)'))
+
+        self.stdout.write('Sending contact notifications')
+        try:
+            while True:
+                sent, failed = send_notifications(
+                    batch_size=max(1, options['batch_size']),
+                    max_attempts=options['max_attempts'],
+                    backoff_seconds=options['backoff'],
+                )
+                if sent:
+                    self.stdout.write(self.style.SUCCESS(f'✓ sent {sent} notification(s)'))
+                if failed:
+                    self.stdout.write(self.style.WARNING(f'✗ {failed} notification(s) will be retried or failed'))
+                if not sent and not failed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker')
@@ -0,0 +1,211 @@
+"""Per-view request metrics collected by ``main.middleware.RequestMetricsMiddleware``.
+
+Each process adds its requests to an in-memory buffer and flushes it every
+``REQUEST_METRICS_FLUSH_INTERVAL`` seconds, adding the buffered counts to
+counters in the default cache with ``cache.incr``. Counters are only ever
+incremented, so concurrent workers never overwrite each other's requests,
+and a busy worker costs a handful of cache writes per flush rather than
+two per request.
+
+Counters are kept per ``REQUEST_METRICS_WINDOW`` (seconds) and the dashboard
+shows the current and previous window. Latencies and query counts are
+counted in fixed buckets, so percentiles and the maximum query count are
+reported as the upper bound of their bucket. Nothing here runs unless
+``REQUEST_METRICS_ENABLED`` is set.
+"""
+import bisect
+import math
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'metrics'
+# per-view counters; durations are summed in microseconds so they stay integers
+FIELDS = ['requests', 'total_us', 'db_us', 'template_us', 'queries', 'size', 'sized']
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100)
+
+# (window, view name) -> counts not yet flushed to the cache
+_pending = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+_current = ContextVar('request_metrics', default=None)
+_templates_instrumented = False
+
+
+@dataclass
+class RequestTimings:
+    queries: int = 0
+    db_ms: float = 0.0
+    template_ms: float = 0.0
+    template_depth: int = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: count queries and time spent in them."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+
+def metrics_enabled():
+    return getattr(settings, 'REQUEST_METRICS_ENABLED', False)
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def instrument_templates():
+    """Time top-level template renders by wrapping the Django backend's Template.render."""
+    global _templates_instrumented
+    if _templates_instrumented:
+        return
+    from django.template.backends.django import Template
+
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return original(self, context, request)
+        timings.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            timings.template_depth -= 1
+            if timings.template_depth == 0:
+                timings.template_ms += (time.perf_counter() - start) * 1000
+
+    Template.render = render
+    _templates_instrumented = True
+
+
+def _window(now=None):
+    return int((now or time.time()) // getattr(settings, 'REQUEST_METRICS_WINDOW', 3600))
+
+
+def _key(window, *parts):
+    return ':'.join([KEY_PREFIX, str(window), *map(str, parts)])
+
+
+def _bucket(bounds, value):
+    return bisect.bisect_left(bounds, value)
+
+
+def record(view_name, total_ms, timings, size):
+    """Add one request to this process's buffer, flushing it when it is due."""
+    counts = {
+        'requests': 1,
+        'total_us': round(total_ms * 1000),
+        'db_us': round(timings.db_ms * 1000),
+        'template_us': round(timings.template_ms * 1000),
+        'queries': timings.queries,
+        f'ms{_bucket(LATENCY_BUCKETS_MS, total_ms)}': 1,
+        f'q{_bucket(QUERY_BUCKETS, timings.queries)}': 1,
+    }
+    if size is not None:
+        counts['sized'] = 1
+        counts['size'] = size
+    with _lock:
+        _pending.setdefault((_window(), view_name), Counter()).update(counts)
+        due = time.monotonic() - _last_flush >= getattr(settings, 'REQUEST_METRICS_FLUSH_INTERVAL', 10)
+    if due:
+        flush()
+
+
+def _incr(key, delta, timeout):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # add() is atomic: if another process created the key first, ours is a no-op
+        cache.add(key, 0, timeout)
+        return cache.incr(key, delta)
+
+
+def _register(window, view_name, timeout):
+    """List `view_name` under `window` once, however many processes race to do it."""
+    if cache.add(_key(window, 'registered', view_name), 1, timeout):
+        slot = _incr(_key(window, 'views'), 1, timeout)
+        cache.set(_key(window, 'view', slot), view_name, timeout)
+
+
+def flush():
+    """Add this process's buffered counts to the shared counters in the cache."""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    # counters outlive the window they belong to, so summary() can still read the previous one
+    timeout = 2 * getattr(settings, 'REQUEST_METRICS_WINDOW', 3600) + 60
+    for (window, view_name), counts in pending.items():
+        _register(window, view_name, timeout)
+        for field, delta in counts.items():
+            if delta:
+                _incr(_key(window, view_name, field), delta, timeout)
+
+
+def _percentile(bounds, histogram, count, pct):
+    """Upper bound of the bucket holding the `pct` percentile (the last bound for the overflow bucket)."""
+    rank = math.ceil(pct / 100 * count)
+    seen = 0
+    for index, n in enumerate(histogram):
+        seen += n
+        if seen >= rank:
+            break
+    return bounds[min(index, len(bounds) - 1)]
+
+
+def summary():
+    """Return one row of statistics per view over the current and previous window, slowest p95 first."""
+    flush()
+    current = _window()
+    windows = (current - 1, current)
+    slots = cache.get_many([_key(w, 'views') for w in windows])
+    names = cache.get_many([
+        _key(w, 'view', slot) for w in windows for slot in range(1, slots.get(_key(w, 'views'), 0) + 1)
+    ])
+    views = sorted(set(names.values()))
+
+    latency_fields = [f'ms{i}' for i in range(len(LATENCY_BUCKETS_MS) + 1)]
+    query_fields = [f'q{i}' for i in range(len(QUERY_BUCKETS) + 1)]
+    fields = FIELDS + latency_fields + query_fields
+    stored = cache.get_many([_key(w, view, field) for w in windows for view in views for field in fields])
+    rows = []
+    for view in views:
+        totals = {field: sum(stored.get(_key(w, view, field), 0) for w in windows) for field in fields}
+        count = totals['requests']
+        if not count:
+            continue
+        latency = [totals[field] for field in latency_fields]
+        queries = [totals[field] for field in query_fields]
+        top = max(i for i, n in enumerate(queries) if n)
+        rows.append({
+            'view': view,
+            'count': count,
+            'p50_ms': _percentile(LATENCY_BUCKETS_MS, latency, count, 50),
+            'p95_ms': _percentile(LATENCY_BUCKETS_MS, latency, count, 95),
+            'p99_ms': _percentile(LATENCY_BUCKETS_MS, latency, count, 99),
+            'avg_queries': round(totals['queries'] / count, 1),
+            'max_queries': QUERY_BUCKETS[min(top, len(QUERY_BUCKETS) - 1)],
+            'avg_db_ms': round(totals['db_us'] / count / 1000, 2),
+            'avg_template_ms': round(totals['template_us'] / count / 1000, 2),
+            'avg_size': totals['size'] // totals['sized'] if totals['sized'] else 0,
+        })
+    rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return rows
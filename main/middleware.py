@@ -0,0 +1,49 @@
+import time
+from contextlib import ExitStack
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB time, template time and response size per URL name.
+
+    Opt-in via ``REQUEST_METRICS_ENABLED``; when it is off Django drops the
+    middleware at startup, so it costs nothing. Timings are also sent to the
+    browser as a ``Server-Timing`` header.
+    """
+
+    def __init__(self, get_response):
+        if not metrics.metrics_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        metrics.instrument_templates()
+
+    def __call__(self, request):
+        timings, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        size = None if response.streaming else len(response.content)
+        server_timing = (
+            f'db;dur={timings.db_ms:.1f};desc="{timings.queries} queries", '
+            f'tpl;dur={timings.template_ms:.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+        if response.has_header('Server-Timing'):
+            server_timing = f"{response['Server-Timing']}, {server_timing}"
+        response['Server-Timing'] = server_timing
+
+        match = getattr(request, 'resolver_match', None)
+        if match and match.view_name:
+            metrics.record(match.view_name, total_ms, timings, size)
+        return response
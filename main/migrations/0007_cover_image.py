@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_cover_images(apps, schema_editor):
+    GallerySection = apps.get_model('main', 'GallerySection')
+    GalleryImage = apps.get_model('main', 'GalleryImage')
+    Project = apps.get_model('main', 'Project')
+    ProjectImage = apps.get_model('main', 'ProjectImage')
+    for section in GallerySection.objects.all():
+        section.cover_image = GalleryImage.objects.filter(section=section).order_by('order', 'created_at').first()
+        section.save(update_fields=['cover_image'])
+    for project in Project.objects.all():
+        project.cover_image = ProjectImage.objects.filter(project=project).order_by('order', 'created_at').first()
+        project.save(update_fields=['cover_image'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_projectimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gallerysection',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.galleryimage'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.projectimage'),
+        ),
+        migrations.RunPython(backfill_cover_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:44
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_imagejob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['year', 'id'], name='achievement_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryimage',
+            index=models.Index(fields=['section', 'order', 'created_at', 'id'], name='galleryimage_section_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gallerysection',
+            index=models.Index(fields=['order', '-created_at'], name='gallerysection_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participation',
+            index=models.Index(fields=['year', 'id'], name='participation_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['created_at', 'id'], name='project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectimage',
+            index=models.Index(fields=['project', 'order', 'created_at', 'id'], name='projectimage_project_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['created_at'], name='teammember_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='teammember_email_lower_idx'),
+        ),
+    ]
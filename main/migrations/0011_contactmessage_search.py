@@ -0,0 +1,117 @@
+# Full-text index for the contact inbox (see main/inbox_search.py).
+#
+# SQLite: an external-content FTS5 table kept in step by triggers.
+# PostgreSQL: a weighted tsvector column filled by a trigger, with a GIN index.
+# Existing rows are indexed here on SQLite; on PostgreSQL run
+# `manage.py rebuild_contact_search` after migrating.
+# Other backends keep the admin's plain icontains search.
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE main_contactmessage_fts USING fts5(
+        name, email, message,
+        content='main_contactmessage', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER main_contactmessage_fts_insert AFTER INSERT ON main_contactmessage BEGIN
+        INSERT INTO main_contactmessage_fts (rowid, name, email, message)
+        VALUES (new.id, new.name, new.email, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER main_contactmessage_fts_delete AFTER DELETE ON main_contactmessage BEGIN
+        INSERT INTO main_contactmessage_fts (main_contactmessage_fts, rowid, name, email, message)
+        VALUES ('delete', old.id, old.name, old.email, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER main_contactmessage_fts_update AFTER UPDATE OF name, email, message ON main_contactmessage BEGIN
+        INSERT INTO main_contactmessage_fts (main_contactmessage_fts, rowid, name, email, message)
+        VALUES ('delete', old.id, old.name, old.email, old.message);
+        INSERT INTO main_contactmessage_fts (rowid, name, email, message)
+        VALUES (new.id, new.name, new.email, new.message);
+    END
+    """,
+    "INSERT INTO main_contactmessage_fts (main_contactmessage_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS main_contactmessage_fts_update',
+    'DROP TRIGGER IF EXISTS main_contactmessage_fts_delete',
+    'DROP TRIGGER IF EXISTS main_contactmessage_fts_insert',
+    'DROP TABLE IF EXISTS main_contactmessage_fts',
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION main_contactmessage_search_vector(name text, email text, message text)
+    RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+        SELECT setweight(to_tsvector('english', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('simple', coalesce(email, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(message, '')), 'B')
+    $$
+    """,
+    """
+    CREATE FUNCTION main_contactmessage_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.search_vector := main_contactmessage_search_vector(NEW.name, NEW.email, NEW.message);
+        RETURN NEW;
+    END
+    $$
+    """,
+    'ALTER TABLE main_contactmessage ADD COLUMN search_vector tsvector',
+    """
+    CREATE TRIGGER main_contactmessage_search_update
+    BEFORE INSERT OR UPDATE OF name, email, message ON main_contactmessage
+    FOR EACH ROW EXECUTE FUNCTION main_contactmessage_search_trigger()
+    """,
+    'CREATE INDEX contactmessage_search_idx ON main_contactmessage USING gin (search_vector)',
+]
+
+POSTGRES_BACKWARD = [
+    'DROP TRIGGER IF EXISTS main_contactmessage_search_update ON main_contactmessage',
+    'ALTER TABLE main_contactmessage DROP COLUMN IF EXISTS search_vector',
+    'DROP FUNCTION IF EXISTS main_contactmessage_search_trigger()',
+    'DROP FUNCTION IF EXISTS main_contactmessage_search_vector(text, text, text)',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+def create_sqlite_fts(apps, schema_editor):
+    # FTS5 is compiled into the SQLite shipped with Python on all supported platforms,
+    # but fall back to the plain admin search rather than failing the deploy if it isn't
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+    for sql in SQLITE_FORWARD:
+        schema_editor.execute(sql)
+
+
+def forward(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        create_sqlite_fts(apps, schema_editor)
+    else:
+        _run({'postgresql': POSTGRES_FORWARD})(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_contactnotification'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD})),
+    ]
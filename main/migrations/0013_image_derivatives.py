@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:44
+
+import posixpath
+
+from django.db import migrations, models
+
+
+def backfill_derivatives(apps, schema_editor):
+    # one last look at storage for images processed before the record existed;
+    # the largest srcset width is written last, so it marks a finished encoding
+    for model_name, field in (('GalleryImage', 'image'), ('ProjectImage', 'image'), ('TeamMember', 'photo')):
+        model = apps.get_model('main', model_name)
+        for obj in model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).iterator():
+            fieldfile = getattr(obj, field)
+            root, ext = posixpath.splitext(fieldfile.name)
+            ext = ext.lower() if ext.lower() in ('.jpg', '.jpeg', '.png', '.webp') else '.png'
+            exts = [e for e in dict.fromkeys([ext, '.avif', '.webp'])
+                    if fieldfile.storage.exists(f'{root}.w1280{e}')]
+            if exts:
+                obj.derivatives = {fieldfile.name: exts}
+                obj.save(update_fields=['derivatives'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_contentversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='projectimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(backfill_derivatives, migrations.RunPython.noop),
+    ]
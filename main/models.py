@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -15,6 +17,8 @@ class TeamMember(models.Model):
         base = slugify(instance.name) if instance.name else 'member'
         return f'team/{base}/{filename}'
     photo = models.ImageField(upload_to=team_photo_upload_path, blank=True, null=True)
+    # encodings the image worker has written, by file name (see main/images.py)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     # gender and pronouns
     GENDER_MALE = 'male'
     GENDER_FEMALE = 'female'
@@ -29,6 +33,13 @@ class TeamMember(models.Model):
     gender = models.CharField(max_length=16, choices=GENDER_CHOICES, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='teammember_created_idx'),
+            # profile and role lookups match on LOWER(email)
+            models.Index(Lower('email'), name='teammember_email_lower_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -50,16 +61,34 @@ class Project(models.Model):
     description = models.TextField(blank=True)
     link = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # first image by order, kept current by main.signals so listings can select_related it
+    cover_image = models.ForeignKey('ProjectImage', null=True, blank=True, editable=False,
+                                    related_name='+', on_delete=models.SET_NULL)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='project_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def refresh_cover_image(self):
+        """Point `cover_image` at the first image by order without touching other fields."""
+        self.cover_image = ProjectImage.objects.filter(project_id=self.pk).order_by('order', 'created_at').first()
+        Project.objects.filter(pk=self.pk).update(cover_image=self.cover_image)
+
 
 class Achievement(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     year = models.PositiveIntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['year', 'id'], name='achievement_year_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.year})" if self.year else self.title
 
@@ -69,6 +98,11 @@ class Participation(models.Model):
     year = models.PositiveIntegerField()
     note = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['year', 'id'], name='participation_year_idx'),
+        ]
+
     def __str__(self):
         return f"{self.event} {self.year}"
 
@@ -90,13 +124,24 @@ class GallerySection(models.Model):
     description = models.TextField(blank=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # first image by order, kept current by main.signals so the index can select_related it
+    cover_image = models.ForeignKey('GalleryImage', null=True, blank=True, editable=False,
+                                    related_name='+', on_delete=models.SET_NULL)
 
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(fields=['order', '-created_at'], name='gallerysection_order_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def refresh_cover_image(self):
+        """Point `cover_image` at the first image by order without touching other fields."""
+        self.cover_image = GalleryImage.objects.filter(section_id=self.pk).order_by('order', 'created_at').first()
+        GallerySection.objects.filter(pk=self.pk).update(cover_image=self.cover_image)
+
 
 def gallery_image_upload_path(instance, filename):
     # store images under media/gallery/<section-slug>/
@@ -106,12 +151,17 @@ def gallery_image_upload_path(instance, filename):
 class GalleryImage(models.Model):
     section = models.ForeignKey(GallerySection, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to=gallery_image_upload_path)
+    # encodings the image worker has written, by file name (see main/images.py)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=250, blank=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['section', 'order', 'created_at', 'id'], name='galleryimage_section_order_idx'),
+        ]
 
     def __str__(self):
         return self.caption or f'Image {self.pk} of {self.section.title}'
@@ -125,12 +175,95 @@ def project_image_upload_path(instance, filename):
 class ProjectImage(models.Model):
     project = models.ForeignKey('Project', related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to=project_image_upload_path)
+    # encodings the image worker has written, by file name (see main/images.py)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=250, blank=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['project', 'order', 'created_at', 'id'], name='projectimage_project_order_idx'),
+        ]
 
     def __str__(self):
         return self.caption or f'Image {self.pk} of {self.project.title}'
+
+
+class ImageJob(models.Model):
+    """Queued derivative generation for one uploaded image (see main/jobs.py)."""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    field_name = models.CharField(max_length=50)
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='imagejob_queue_idx'),
+            models.Index(fields=['model_label', 'object_id'], name='imagejob_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.file_name} ({self.get_status_display()})'
+
+
+class ContactNotification(models.Model):
+    """Queued admin email for one contact message (see main/notifications.py)."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    message = models.OneToOneField(ContactMessage, on_delete=models.CASCADE, related_name='notification')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='contactnotify_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notification for {self.message} ({self.status})"
+
+
+class ContentVersion(models.Model):
+    """Content version of one model, shared by every process and function (see main/cache.py)."""
+    label = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField()
+    # Unix time of the last bump
+    modified = models.BigIntegerField()
+
+    def __str__(self):
+        return f'{self.label} v{self.version}'
@@ -0,0 +1,139 @@
+"""Admin email notifications for contact form submissions.
+
+The contact view only inserts the ``ContactMessage``; a ``post_save`` signal
+queues a ``ContactNotification`` row next to it. The
+``send_contact_notifications`` management command claims due rows in
+batches and sends each batch over a single SMTP connection, retrying
+failures with exponential backoff, the same way ``main.jobs`` handles image
+work. Set ``CONTACT_NOTIFY_ASYNC=False`` to send right after the request's
+transaction commits instead.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ContactNotification
+
+
+def notification_recipients():
+    """Addresses that receive contact notifications: CONTACT_NOTIFY_EMAILS, else ADMINS."""
+    recipients = list(getattr(settings, 'CONTACT_NOTIFY_EMAILS', []))
+    if not recipients:
+        recipients = [email for _, email in getattr(settings, 'ADMINS', [])]
+    return recipients
+
+
+def notification_is_async():
+    return getattr(settings, 'CONTACT_NOTIFY_ASYNC', True)
+
+
+def build_email(contact, recipients):
+    return EmailMessage(
+        subject=f'New contact message from {contact.name}',
+        body=(
+            f'From: {contact.name} <{contact.email}>\n'
+            f'Received: {contact.created_at:%Y-%m-%d %H:%M}\n\n'
+            f'{contact.message}\n'
+        ),
+        to=recipients,
+        reply_to=[contact.email],
+    )
+
+
+def enqueue_contact_notification(contact):
+    """Queue the admin email for `contact`, or send it after commit when not async."""
+    if not notification_recipients():
+        return None
+    notification = ContactNotification.objects.create(message=contact)
+    if not notification_is_async():
+        transaction.on_commit(lambda: send_notifications([notification.pk]))
+    return notification
+
+
+def claim_notifications(limit, pks=None):
+    """Mark up to `limit` due notifications as sending and return them with their messages."""
+    now = timezone.now()
+    candidates = ContactNotification.objects.filter(
+        status=ContactNotification.STATUS_PENDING, run_after__lte=now,
+    )
+    if pks is not None:
+        candidates = candidates.filter(pk__in=pks)
+    candidates = candidates.order_by('run_after', 'pk').values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in list(candidates):
+        updated = ContactNotification.objects.filter(pk=pk, status=ContactNotification.STATUS_PENDING).update(
+            status=ContactNotification.STATUS_SENDING, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(ContactNotification.objects.select_related('message').filter(pk__in=claimed).order_by('pk'))
+
+
+def reset_stale_notifications(older_than):
+    """Return notifications stuck in `sending` (e.g. after a worker crash) to the queue."""
+    cutoff = timezone.now() - older_than
+    return ContactNotification.objects.filter(
+        status=ContactNotification.STATUS_SENDING, updated_at__lt=cutoff,
+    ).update(status=ContactNotification.STATUS_PENDING, run_after=timezone.now())
+
+
+def mark_sent(notification):
+    now = timezone.now()
+    ContactNotification.objects.filter(pk=notification.pk).update(
+        status=ContactNotification.STATUS_SENT, last_error='', sent_at=now, updated_at=now,
+    )
+
+
+def mark_failed(notification, exc, max_attempts, backoff_seconds):
+    """Reschedule `notification` with exponential backoff, or fail it for good."""
+    error = ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+    now = timezone.now()
+    if notification.attempts < max_attempts:
+        delay = timedelta(seconds=backoff_seconds * 2 ** (notification.attempts - 1))
+        ContactNotification.objects.filter(pk=notification.pk).update(
+            status=ContactNotification.STATUS_PENDING, last_error=error, run_after=now + delay, updated_at=now,
+        )
+    else:
+        ContactNotification.objects.filter(pk=notification.pk).update(
+            status=ContactNotification.STATUS_FAILED, last_error=error, updated_at=now,
+        )
+
+
+def send_notifications(pks=None, batch_size=50, max_attempts=None, backoff_seconds=60):
+    """Send one batch of due notifications over a single connection.
+
+    Returns ``(sent, failed)``. A connection error fails the whole batch; an
+    error on one message only reschedules that message.
+    """
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'CONTACT_NOTIFY_MAX_ATTEMPTS', 5)
+    notifications = claim_notifications(batch_size, pks)
+    if not notifications:
+        return 0, 0
+    recipients = notification_recipients()
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for notification in notifications:
+            mark_failed(notification, e, max_attempts, backoff_seconds)
+        return 0, len(notifications)
+    try:
+        for notification in notifications:
+            try:
+                connection.send_messages([build_email(notification.message, recipients)])
+            except Exception as e:
+                mark_failed(notification, e, max_attempts, backoff_seconds)
+                failed += 1
+            else:
+                mark_sent(notification)
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,114 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor holds the ordering values of the last row on a page, encoded as
+URL-safe base64 JSON. The next page is fetched with a lexicographic "after"
+filter on those values, so the database walks an index from that point
+instead of counting past an OFFSET. Orderings must end in a unique field
+(normally ``id``) so every row has exactly one position. NULLs in nullable
+columns always sort last, whatever the direction.
+"""
+import base64
+import json
+
+from django.db.models import F, Q
+
+
+def _name(field):
+    return field.lstrip('-')
+
+
+def encode_cursor(obj, ordering):
+    values = []
+    for field in ordering:
+        value = getattr(obj, _name(field))
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """Return the ordering values stored in `token`, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [
+            model._meta.get_field(_name(field)).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except Exception:
+        return None
+
+
+def _nullable(model, field):
+    return model._meta.get_field(_name(field)).null
+
+
+def _order_by(model, ordering):
+    exprs = []
+    for field in ordering:
+        if not _nullable(model, field):
+            exprs.append(field)
+        elif field.startswith('-'):
+            exprs.append(F(_name(field)).desc(nulls_last=True))
+        else:
+            exprs.append(F(_name(field)).asc(nulls_last=True))
+    return exprs
+
+
+def _equals(field, value):
+    if value is None:
+        return Q(**{f'{_name(field)}__isnull': True})
+    return Q(**{_name(field): value})
+
+
+def _after(model, ordering, values):
+    """Q matching rows that sort strictly after `values` under `ordering`."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        if values[i] is None:
+            # nothing sorts after NULL in this column; only ties carry on
+            continue
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        clause = Q(**{f'{_name(field)}__{lookup}': values[i]})
+        if _nullable(model, field):
+            clause |= Q(**{f'{_name(field)}__isnull': True})
+        for prev, value in zip(ordering[:i], values[:i]):
+            clause &= _equals(prev, value)
+        condition |= clause
+    return condition
+
+
+def _page_query(queryset, ordering, cursor, page_size):
+    model = queryset.model
+    queryset = queryset.order_by(*_order_by(model, ordering))
+    if cursor:
+        values = decode_cursor(cursor, model, ordering)
+        if values is not None:
+            queryset = queryset.filter(_after(model, ordering, values))
+    # one extra row tells whether there is a next page
+    return queryset[:page_size + 1]
+
+
+def _split_page(items, ordering, page_size):
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1], ordering)
+    return items, next_cursor
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=24):
+    """Return ``(items, next_cursor)`` for the page after `cursor`.
+
+    An invalid or missing cursor starts from the first page. `next_cursor`
+    is None on the last page.
+    """
+    return _split_page(list(_page_query(queryset, ordering, cursor, page_size)), ordering, page_size)
+
+
+async def akeyset_page(queryset, ordering, cursor=None, page_size=24):
+    """Async `keyset_page`, fetching the rows with the async ORM."""
+    query = _page_query(queryset, ordering, cursor, page_size)
+    return _split_page([item async for item in query], ordering, page_size)
@@ -0,0 +1,116 @@
+"""Token-bucket rate limiting for the form endpoints (contact, login, signup).
+
+Every POST takes a token from two buckets, one keyed by client IP and one by
+the submitted email address, before the view runs, so rejected requests cost
+a couple of cache round trips instead of a password hash or a DB write.
+Buckets live in the default cache as ``(tokens, timestamp)`` pairs and refill
+continuously; ``RATE_LIMITS`` maps each scope to ``(burst, period_seconds)``,
+meaning a full bucket of `burst` requests refills over `period_seconds`.
+
+Reads and writes are not atomic, so a burst of concurrent requests can
+overshoot a bucket by a few tokens. That is fine for shedding bot traffic.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+BUCKET_KEY_PREFIX = 'ratelimit'
+REJECTED_KEY_PREFIX = 'ratelimit-rejected'
+
+DEFAULT_RATE_LIMITS = {
+    'contact': (5, 10 * 60),
+    'login': (10, 5 * 60),
+    'signup': (5, 60 * 60),
+}
+
+
+def rate_limits():
+    return {**DEFAULT_RATE_LIMITS, **getattr(settings, 'RATE_LIMITS', {})}
+
+
+def client_ip(request):
+    """The client address as seen by the outermost of RATE_LIMIT_PROXY_HOPS trusted proxies.
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so only the last `hops` entries are trustworthy; anything
+    to the left of them was sent by the client and can be forged.
+    """
+    hops = getattr(settings, 'RATE_LIMIT_PROXY_HOPS', 0)
+    if hops > 0:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _bucket_key(scope, kind, identity):
+    digest = hashlib.md5(identity.encode('utf-8')).hexdigest()
+    return f'{BUCKET_KEY_PREFIX}:{scope}:{kind}:{digest}'
+
+
+def take_token(key, burst, period):
+    """Take one token from the bucket at `key`; return seconds to wait, or 0 if allowed."""
+    now = time.time()
+    rate = burst / period
+    state = cache.get(key)
+    tokens, updated = state if state else (burst, now)
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        cache.set(key, (tokens - 1, now), period)
+        return 0
+    cache.set(key, (tokens, now), period)
+    return (1 - tokens) / rate
+
+
+def record_rejection(scope):
+    key = f'{REJECTED_KEY_PREFIX}:{scope}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def rejection_counts():
+    """Rejected requests per scope since the cache was last cleared."""
+    scopes = list(rate_limits())
+    found = cache.get_many([f'{REJECTED_KEY_PREFIX}:{scope}' for scope in scopes])
+    return {scope: found.get(f'{REJECTED_KEY_PREFIX}:{scope}', 0) for scope in scopes}
+
+
+def check_rate_limit(request, scope):
+    """Charge this request to its IP and email buckets; return seconds to wait, or 0."""
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return 0
+    burst, period = rate_limits()[scope]
+    identities = [('ip', client_ip(request))]
+    email = request.POST.get('email', '').strip().lower()
+    if email:
+        identities.append(('email', email))
+    wait = 0
+    for kind, identity in identities:
+        wait = max(wait, take_token(_bucket_key(scope, kind, identity), burst, period))
+    if wait:
+        record_rejection(scope)
+    return wait
+
+
+def rate_limited(scope):
+    """Reject POSTs to the view with a 429 once the scope's buckets are empty."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = check_rate_limit(request, scope)
+                if wait:
+                    response = HttpResponse('Too many requests. Please try again later.',
+                                            status=429, content_type='text/plain')
+                    response['Retry-After'] = str(int(wait) + 1)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
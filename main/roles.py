@@ -0,0 +1,105 @@
+"""Role resolution for signed-in users, shared by the templates, studio and profile.
+
+A user is a Team Leader when they are staff or superuser, a Team Member when
+a ``TeamMember`` has their email, and Other otherwise. Studio access
+("privileged") is leaders plus the addresses in ``ADMIN_ALLOWED_EMAILS``.
+
+Results are cached per user. The cache key includes the user's email and
+staff flags plus the TeamMember content version (bumped by ``main.signals``
+on every TeamMember save or delete), so a changed flag or a changed
+TeamMember email resolves afresh without explicit invalidation.
+"""
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db.models.functions import Lower
+
+from .cache import get_content_version
+from .models import TeamMember
+
+ROLE_KEY_PREFIX = 'user-role'
+ROLE_TIMEOUT = 60 * 60
+
+LEADER = 'leader'
+MEMBER = 'member'
+OTHER = 'other'
+ROLE_LABELS = {LEADER: 'Team Leader', MEMBER: 'Team Member', OTHER: 'Other'}
+
+
+@dataclass
+class UserRole:
+    role: str = OTHER
+    is_privileged: bool = False
+    team_member: TeamMember = None
+
+    @property
+    def label(self):
+        return ROLE_LABELS[self.role]
+
+
+ANONYMOUS = UserRole()
+
+
+@lru_cache(maxsize=None)
+def allowed_emails():
+    """ADMIN_ALLOWED_EMAILS as a lowercased frozenset, built once per process."""
+    return frozenset(e.strip().lower() for e in getattr(settings, 'ADMIN_ALLOWED_EMAILS', []) or [] if e)
+
+
+def _reset_allowed_emails(setting, **kwargs):
+    if setting == 'ADMIN_ALLOWED_EMAILS':
+        allowed_emails.cache_clear()
+
+
+setting_changed.connect(_reset_allowed_emails, dispatch_uid='reset_allowed_emails')
+
+
+def _role_key(user):
+    email = hashlib.md5((user.email or '').lower().encode('utf-8')).hexdigest()
+    return (f'{ROLE_KEY_PREFIX}:{user.pk}:{int(user.is_staff)}{int(user.is_superuser)}:'
+            f'{get_content_version(TeamMember)}:{email}')
+
+
+def _resolve(user):
+    email = (user.email or '').lower()
+    team_member = None
+    if email:
+        # LOWER(email) = ... matches teammember_email_lower_idx, unlike iexact
+        team_member = TeamMember.objects.alias(email_lower=Lower('email')).filter(email_lower=email).first()
+    if user.is_staff or user.is_superuser:
+        role = LEADER
+    elif team_member:
+        role = MEMBER
+    else:
+        role = OTHER
+    return UserRole(role=role, team_member=team_member)
+
+
+def resolve_role(user):
+    """Return the `UserRole` for `user`, memoized on the user and cached across requests."""
+    if not user or not user.is_authenticated:
+        return ANONYMOUS
+    role = getattr(user, '_role', None)
+    if role is None:
+        key = _role_key(user)
+        role = cache.get(key)
+        if role is None:
+            try:
+                role = _resolve(user)
+            except Exception:
+                # e.g. tables missing during the first deploy
+                leader = user.is_staff or user.is_superuser
+                return UserRole(role=LEADER if leader else OTHER, is_privileged=leader)
+            cache.set(key, role, ROLE_TIMEOUT)
+        # checked per request so ADMIN_ALLOWED_EMAILS changes apply immediately
+        role.is_privileged = role.role == LEADER or (user.email or '').lower() in allowed_emails()
+        user._role = role
+    return role
+
+
+def is_privileged(user):
+    return resolve_role(user).is_privileged
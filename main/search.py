@@ -0,0 +1,281 @@
+"""Site search over team members, projects, achievements and galleries.
+
+Each process keeps an inverted index in memory: every word of the indexed
+fields maps to the documents containing it, and a sorted word list lets a
+prefix query find its matching words with two bisects instead of scanning
+rows. Queries never touch the database.
+
+The index records the content version (see ``main.cache``) of each model it
+was built from. Saves and deletes in this process are applied to it
+incrementally by ``main.signals``; a change made by another process shows up
+as a newer content version, and the next search rebuilds the index from the
+database.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.urls import reverse
+
+from .cache import get_content_version, get_content_versions
+from .models import Achievement, GalleryImage, GallerySection, Participation, Project, TeamMember
+
+SEARCH_MODELS = (TeamMember, Project, Achievement, Participation, GallerySection, GalleryImage)
+
+# score weights: a match in a document's title counts more than one in its text
+TITLE_WEIGHT = 3
+TEXT_WEIGHT = 1
+# a query word matching a whole word beats one that is only its prefix
+EXACT_BONUS = 2
+
+MAX_QUERY_WORDS = 8
+# below this many candidates per posting, checking each candidate's words beats merging postings
+FILTER_WORDS_PER_DOCUMENT = 8
+MIN_PREFIX_LENGTH = 2
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercase `text` and strip accents, so "Café" and "cafe" index alike."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return _WORD.findall(normalize(text))
+
+
+KINDS = {
+    TeamMember: 'Team',
+    Project: 'Project',
+    Achievement: 'Achievement',
+    Participation: 'Participation',
+    GallerySection: 'Gallery',
+    GalleryImage: 'Photo',
+}
+
+
+@dataclass(frozen=True)
+class Document:
+    kind: str
+    pk: int
+    title: str
+    subtitle: str
+    text: str
+    url: str
+
+    @property
+    def key(self):
+        return (self.kind, self.pk)
+
+
+def _team_member(member):
+    return Document(KINDS[TeamMember], member.pk, member.name, member.title, member.bio, reverse('main:team'))
+
+
+def _project(project):
+    return Document(KINDS[Project], project.pk, project.title, '', project.description, reverse('main:projects'))
+
+
+def _achievement(achievement):
+    return Document(KINDS[Achievement], achievement.pk, achievement.title, str(achievement.year or ''),
+                    achievement.description, reverse('main:achievements'))
+
+
+def _participation(participation):
+    return Document(KINDS[Participation], participation.pk, participation.event, str(participation.year),
+                    participation.note, reverse('main:achievements'))
+
+
+def _gallery_section(section):
+    return Document(KINDS[GallerySection], section.pk, section.title, '', section.description,
+                    reverse('main:gallery_section', args=[section.slug]))
+
+
+def _gallery_image(image):
+    if not image.caption:
+        return None
+    section = image.section
+    return Document(KINDS[GalleryImage], image.pk, image.caption, section.title, '',
+                    reverse('main:gallery_section', args=[section.slug]))
+
+
+# model -> (queryset of indexable rows, Document builder)
+SOURCES = {
+    TeamMember: (lambda: TeamMember.objects.only('name', 'title', 'bio'), _team_member),
+    Project: (lambda: Project.objects.only('title', 'description'), _project),
+    Achievement: (lambda: Achievement.objects.all(), _achievement),
+    Participation: (lambda: Participation.objects.all(), _participation),
+    GallerySection: (lambda: GallerySection.objects.only('title', 'slug', 'description'), _gallery_section),
+    GalleryImage: (lambda: GalleryImage.objects.exclude(caption='').select_related('section')
+                   .only('caption', 'section__title', 'section__slug'), _gallery_image),
+}
+
+
+class SearchIndex:
+    def __init__(self, versions=None):
+        self.versions = versions
+        self.documents = {}
+        # word -> {document key: weight}
+        self.postings = {}
+        # document key -> words it was indexed under, for removal
+        self.document_words = {}
+        self.words = []
+
+    def add(self, document):
+        self.remove(document.key)
+        weights = {}
+        for word in tokenize(document.title):
+            weights[word] = TITLE_WEIGHT
+        for word in tokenize(f'{document.subtitle} {document.text}'):
+            weights.setdefault(word, TEXT_WEIGHT)
+        for word, weight in weights.items():
+            posting = self.postings.get(word)
+            if posting is None:
+                posting = self.postings[word] = {}
+                bisect.insort(self.words, word)
+            posting[document.key] = weight
+        self.documents[document.key] = document
+        self.document_words[document.key] = tuple(weights)
+
+    def remove(self, key):
+        self.documents.pop(key, None)
+        for word in self.document_words.pop(key, ()):
+            posting = self.postings[word]
+            posting.pop(key, None)
+            if not posting:
+                del self.postings[word]
+                del self.words[bisect.bisect_left(self.words, word)]
+
+    def _word_range(self, prefix):
+        start = bisect.bisect_left(self.words, prefix)
+        end = bisect.bisect_left(self.words, prefix + '\uffff', start)
+        return self.words[start:end]
+
+    def _score(self, word, prefix, key):
+        return self.postings[word][key] + (EXACT_BONUS if word == prefix else 0)
+
+    def _matches(self, prefix, words):
+        """Scores for every document containing one of `words` (those starting with `prefix`)."""
+        scores = {}
+        for word in words:
+            bonus = EXACT_BONUS if word == prefix else 0
+            for key, weight in self.postings[word].items():
+                if weight + bonus > scores.get(key, 0):
+                    scores[key] = weight + bonus
+        return scores
+
+    def _filter(self, totals, prefix):
+        """Add `prefix`'s score to the candidates in `totals` that contain it, dropping the rest."""
+        narrowed = {}
+        for key, total in totals.items():
+            scores = [self._score(word, prefix, key) for word in self.document_words[key] if word.startswith(prefix)]
+            if scores:
+                narrowed[key] = total + max(scores)
+        return narrowed
+
+    def search(self, query, limit=20):
+        """Documents matching every word of `query` as a word prefix, best first."""
+        prefixes = tokenize(query)[:MAX_QUERY_WORDS]
+        if not prefixes or (len(prefixes) == 1 and len(prefixes[0]) < MIN_PREFIX_LENGTH):
+            return []
+        # start from the most selective word, then only check its candidates for the others
+        ranges = sorted(
+            ((sum(len(self.postings[word]) for word in words), prefix, words)
+             for prefix, words in ((prefix, self._word_range(prefix)) for prefix in prefixes)),
+            key=lambda item: item[0],
+        )
+        _, prefix, words = ranges[0]
+        totals = self._matches(prefix, words)
+        for cost, prefix, words in ranges[1:]:
+            if not totals:
+                break
+            if len(totals) * FILTER_WORDS_PER_DOCUMENT < cost:
+                totals = self._filter(totals, prefix)
+            else:
+                scores = self._matches(prefix, words)
+                totals = {key: total + scores[key] for key, total in totals.items() if key in scores}
+        best = heapq.nsmallest(limit, totals.items(), key=lambda item: (-item[1], item[0]))
+        ranked = sorted(best, key=lambda item: (-item[1], self.documents[item[0]].title.lower()))
+        return [self.documents[key] for key, _ in ranked]
+
+
+_index = SearchIndex()
+_lock = threading.Lock()
+
+
+def build_index():
+    """Build a fresh index from the database."""
+    # read the versions first, so edits made during the build trigger another one
+    index = SearchIndex(versions=get_content_versions(*SEARCH_MODELS))
+    for model in SEARCH_MODELS:
+        queryset, to_document = SOURCES[model]
+        for obj in queryset().iterator(chunk_size=2000):
+            document = to_document(obj)
+            if document is not None:
+                index.add(document)
+    return index
+
+
+def get_index():
+    """This process's index, rebuilt first if another process changed the content."""
+    global _index
+    versions = get_content_versions(*SEARCH_MODELS)
+    if _index.versions != versions:
+        with _lock:
+            if _index.versions != versions:
+                _index = build_index()
+    return _index
+
+
+def search(query, limit=20):
+    index = get_index()
+    # incremental updates from other threads mutate the index in place
+    with _lock:
+        return index.search(query, limit)
+
+
+def _reindex(index, model, pk, deleted):
+    queryset, to_document = SOURCES[model]
+    obj = None if deleted else queryset().filter(pk=pk).first()
+    document = to_document(obj) if obj is not None else None
+    if document is None:
+        # deleted, or no longer indexable (e.g. a cleared caption)
+        index.remove((KINDS[model], pk))
+    else:
+        index.add(document)
+    if model is GallerySection and not deleted:
+        # photos show their section's title and link to its slug
+        for image in SOURCES[GalleryImage][0]().filter(section_id=pk):
+            index.add(_gallery_image(image))
+
+
+def apply_change(model, pk, version, deleted=False):
+    """Apply one saved or deleted row to this process's index.
+
+    `version` is the model's content version after the change was recorded.
+    The update is only applied if the index was current just before it;
+    otherwise the index is already stale and the next search rebuilds it.
+    """
+    with _lock:
+        index = _index
+        if index.versions is None:
+            return
+        position = SEARCH_MODELS.index(model)
+        if index.versions[position] != version - 1:
+            return
+        _reindex(index, model, pk, deleted)
+        versions = list(index.versions)
+        versions[position] = version
+        index.versions = tuple(versions)
+
+
+def index_changed(sender, instance, **kwargs):
+    """post_save/post_delete receiver; connected after bump_version, whose on-commit bump runs first."""
+    pk, deleted = instance.pk, 'created' not in kwargs
+    transaction.on_commit(lambda: apply_change(sender, pk, get_content_version(sender), deleted))
@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .cache import bump_content_version
+from .jobs import enqueue_image
+from .notifications import enqueue_contact_notification
+from .search import SEARCH_MODELS, index_changed
+from .models import TeamMember, Project, ProjectImage, Achievement, Participation
+from .models import GallerySection, GalleryImage, ContactMessage
+
+# Models whose edits should invalidate the cached public pages
+VERSIONED_MODELS = (
+    TeamMember,
+    Project,
+    ProjectImage,
+    Achievement,
+    Participation,
+    GallerySection,
+    GalleryImage,
+)
+
+
+def bump_version(sender, **kwargs):
+    # after commit: a bump inside the transaction would let a concurrent request
+    # cache the old rows under the new version
+    transaction.on_commit(lambda: bump_content_version(sender))
+
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_version, sender=_model, dispatch_uid=f'bump_version_save_{_model.__name__}')
+    post_delete.connect(bump_version, sender=_model, dispatch_uid=f'bump_version_delete_{_model.__name__}')
+
+
+# Keep each process's site search index current; connected after bump_version,
+# whose new content version the index records
+for _model in SEARCH_MODELS:
+    post_save.connect(index_changed, sender=_model, dispatch_uid=f'search_index_save_{_model.__name__}')
+    post_delete.connect(index_changed, sender=_model, dispatch_uid=f'search_index_delete_{_model.__name__}')
+
+
+def refresh_gallery_cover(sender, instance, **kwargs):
+    GallerySection(pk=instance.section_id).refresh_cover_image()
+
+
+def refresh_project_cover(sender, instance, **kwargs):
+    Project(pk=instance.project_id).refresh_cover_image()
+
+
+# Keep the denormalized cover images in step with image adds, reorders and deletes
+post_save.connect(refresh_gallery_cover, sender=GalleryImage, dispatch_uid='refresh_gallery_cover_save')
+post_delete.connect(refresh_gallery_cover, sender=GalleryImage, dispatch_uid='refresh_gallery_cover_delete')
+post_save.connect(refresh_project_cover, sender=ProjectImage, dispatch_uid='refresh_project_cover_save')
+post_delete.connect(refresh_project_cover, sender=ProjectImage, dispatch_uid='refresh_project_cover_delete')
+
+
+def queue_image_derivatives(sender, instance, **kwargs):
+    field = 'photo' if sender is TeamMember else 'image'
+    enqueue_image(instance, field)
+
+
+# Thumbnails and modern formats are built by the image worker (see main/jobs.py)
+for _model in (GalleryImage, ProjectImage, TeamMember):
+    post_save.connect(queue_image_derivatives, sender=_model, dispatch_uid=f'generate_derivatives_{_model.__name__}')
+
+
+def queue_contact_notification(sender, instance, created, **kwargs):
+    if created:
+        enqueue_contact_notification(instance)
+
+
+# Admin emails are sent by `manage.py send_contact_notifications` (see main/notifications.py)
+post_save.connect(queue_contact_notification, sender=ContactMessage, dispatch_uid='queue_contact_notification')
@@ -0,0 +1,80 @@
+from django.contrib.sitemaps import Sitemap
+from django.db.models import Max
+from django.urls import reverse
+
+from .models import TeamMember, Project, ProjectImage, GallerySection, GalleryImage
+
+
+def _newest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+class StaticViewSitemap(Sitemap):
+    protocol = 'https'
+    changefreq = 'weekly'
+
+    # URL name -> sitemap priority
+    pages = {
+        'main:home': 1.0,
+        'main:about': 0.8,
+        'main:team': 0.8,
+        'main:projects': 0.9,
+        'main:achievements': 0.7,
+        'main:gallery_index': 0.7,
+        'main:gallery_projects': 0.6,
+        'main:contact': 0.6,
+    }
+
+    def items(self):
+        return list(self.pages)
+
+    def location(self, item):
+        return reverse(item)
+
+    def priority(self, item):
+        return self.pages[item]
+
+    def _lastmods(self):
+        # one aggregate per model, computed once per sitemap render
+        if not hasattr(self, '_lastmod_cache'):
+            team = TeamMember.objects.aggregate(m=Max('created_at'))['m']
+            projects = _newest(Project.objects.aggregate(m=Max('created_at'))['m'],
+                               ProjectImage.objects.aggregate(m=Max('created_at'))['m'])
+            gallery = _newest(GallerySection.objects.aggregate(m=Max('created_at'))['m'],
+                              GalleryImage.objects.aggregate(m=Max('created_at'))['m'])
+            self._lastmod_cache = {
+                'main:home': _newest(team, projects),
+                'main:team': team,
+                'main:projects': projects,
+                'main:gallery_projects': projects,
+                'main:gallery_index': gallery,
+            }
+        return self._lastmod_cache
+
+    def lastmod(self, item):
+        return self._lastmods().get(item)
+
+
+class GallerySectionSitemap(Sitemap):
+    protocol = 'https'
+    changefreq = 'monthly'
+    priority = 0.6
+
+    def items(self):
+        return GallerySection.objects.annotate(latest_image=Max('images__created_at')).order_by('order', '-created_at', 'id')
+
+    def location(self, section):
+        return reverse('main:gallery_section', args=[section.slug])
+
+    def lastmod(self, section):
+        return _newest(section.created_at, section.latest_image)
+
+
+SITEMAPS = {
+    'pages': StaticViewSitemap,
+    'gallery': GallerySectionSitemap,
+}
+
+# Models whose edits change the sitemap; used to version its page cache
+SITEMAP_MODELS = (TeamMember, Project, ProjectImage, GallerySection, GalleryImage)
@@ -0,0 +1,53 @@
+import uuid
+
+from django import template
+from django.apps import apps
+from django.db import DatabaseError
+
+from main.cache import get_content_versions, mark_page_degraded, release_token
+
+register = template.Library()
+
+
+@register.simple_tag
+def fragment_version(*model_labels):
+    """Vary-on value for ``{% cache %}`` fragments that depend on `model_labels`.
+
+    Combines the deployed templates' release token with the content versions
+    of the given models, so a deploy or an admin edit moves the fragment to a
+    fresh key, e.g. ``{% fragment_version 'main.TeamMember' as team_version %}``.
+    """
+    try:
+        versions = get_content_versions(*(apps.get_model(label) for label in model_labels))
+    except DatabaseError:
+        # a key no later render uses, so the fallback fragment is never served again
+        mark_page_degraded()
+        return uuid.uuid4().hex
+    return '.'.join([release_token(), *(str(v) for v in versions)])
+
+
+# URL name -> the nav link marked active on that page
+NAV_SECTIONS = {
+    'main:home': 'home',
+    'main:about': 'about',
+    'main:team': 'team',
+    'main:projects': 'projects',
+    'main:contact': 'contact',
+    'main:achievements': 'achievements',
+}
+
+
+@register.simple_tag(takes_context=True)
+def nav_section(context):
+    """The layout nav's active section, computed outside its ``{% cache %}`` fragment.
+
+    Varying the fragment on this instead of ``request.path`` keeps it to one
+    cache entry per section rather than one per URL.
+    """
+    request = context.get('request')
+    if request is None:
+        return ''
+    if 'gallery' in request.path:
+        return 'gallery'
+    match = getattr(request, 'resolver_match', None)
+    return NAV_SECTIONS.get(match.view_name, '') if match else ''
@@ -0,0 +1,33 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from main import images
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(fieldfile, size):
+    """URL of a fixed-size thumbnail, e.g. ``{{ img.image|thumbnail:'tile' }}``."""
+    return images.derivative_url(fieldfile, size)
+
+
+@register.filter
+def srcset(fieldfile):
+    """`srcset` ladder for an image, e.g. ``srcset="{{ img.image|srcset }}"``."""
+    return images.srcset(fieldfile)
+
+
+@register.simple_tag
+def picture_sources(fieldfile, size=None, sizes=None, lazy=False):
+    """AVIF/WebP ``<source>`` elements to place in a ``<picture>`` before its ``<img>``.
+
+    Pass a thumbnail `size` for a fixed crop, or `sizes` to use the width
+    ladder. With `lazy` the URLs go in ``data-srcset`` for script.js to swap in.
+    """
+    attr = 'data-srcset' if lazy else 'srcset'
+    sizes_attr = format_html(' sizes="{}"', sizes) if sizes and not size else ''
+    return format_html_join(
+        '', '<source type="{}" ' + attr + '="{}"{}>',
+        ((mime, value, sizes_attr) for mime, value in images.picture_sources(fieldfile, size)),
+    )
@@ -0,0 +1,38 @@
+"""Template warm-up: parse every project template once per process.
+
+With the cached loader (production settings) each worker keeps compiled
+templates in memory, but only after the first request that uses them. Calling
+``compile_templates()`` while the WSGI/ASGI application is loaded moves that
+cost to boot; ``manage.py compile_templates`` runs the same pass at deploy
+time and fails on syntax errors.
+"""
+from pathlib import Path
+
+from django.template import TemplateSyntaxError, engines
+
+
+def template_names(engine):
+    """Names of all ``.html`` templates under the engine's DIRS, e.g. ``account/login.html``."""
+    names = []
+    for directory in engine.dirs:
+        directory = Path(directory)
+        names += sorted(path.relative_to(directory).as_posix() for path in directory.rglob('*.html'))
+    return names
+
+
+def compile_templates():
+    """Load every project template through the configured loaders.
+
+    Returns ``(compiled, errors)`` where `errors` maps template names to the
+    exception raised while compiling them.
+    """
+    backend = engines['django']
+    compiled, errors = [], {}
+    for name in template_names(backend.engine):
+        try:
+            backend.get_template(name)
+        except TemplateSyntaxError as e:
+            errors[name] = e
+        else:
+            compiled.append(name)
+    return compiled, errors
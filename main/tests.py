@@ -0,0 +1,882 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import default_storage
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.http import StreamingHttpResponse
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import async_views, images, inbox, inbox_search, jobs, metrics, notifications, ratelimit, views
+from . import search as site_search
+from .cache import bump_content_version, forget_content_versions, get_content_version, get_content_versions
+from .cache_backends import CULL_CHECK_INTERVAL, SQLiteCache
+from .models import (
+    Achievement, ContactMessage, ContactNotification, ContentVersion, GalleryImage, GallerySection, ImageJob,
+    Participation, Project, ProjectImage, TeamMember,
+)
+from .signals import VERSIONED_MODELS
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, MEDIA_ROOT=tempfile.gettempdir(), CONTENT_VERSION_TTL=60)
+class HomePageQueryCountTests(TestCase):
+    """The home page must not run per-project image queries (see views.home_querysets)."""
+
+    # team members, projects with their cover image, achievements, participations
+    HOME_QUERIES = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            TeamMember.objects.create(name=f'Member {i}', title='Developer')
+        for i in range(6):
+            project = Project.objects.create(title=f'Project {i}', description='A project')
+            for order in range(3):
+                ProjectImage.objects.create(project=project, image=f'projects/p{i}/{order}.jpg', order=order)
+        Achievement.objects.create(title='Hackathon winner', year=2024)
+        Participation.objects.create(event='Code Sprint', year=2023)
+
+    def setUp(self):
+        # the home bundle and the card fragments live in the cache
+        cache.clear()
+        # content versions are read once per CONTENT_VERSION_TTL, not per request
+        forget_content_versions()
+        get_content_versions(*VERSIONED_MODELS)
+
+    def assertHomeQueries(self):
+        with CaptureQueriesContext(connection) as queries:
+            # secure: SECURE_SSL_REDIRECT is on whenever DEBUG is off
+            response = self.client.get('/', secure=True)
+        # check the status first, so a redirect can't pass for a query-count failure
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), self.HOME_QUERIES,
+                         '\n'.join(query['sql'] for query in queries.captured_queries))
+        return response
+
+    def test_home_query_count(self):
+        response = self.assertHomeQueries()
+        self.assertContains(response, 'projects/p5/0.jpg')
+
+    def test_home_query_count_does_not_grow_with_projects(self):
+        for i in range(6, 12):
+            project = Project.objects.create(title=f'Project {i}')
+            ProjectImage.objects.create(project=project, image=f'projects/p{i}/0.jpg')
+        self.assertHomeQueries()
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, MEDIA_ROOT=tempfile.gettempdir(), CONTENT_VERSION_TTL=60)
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TeamMember.objects.create(name='Ada')
+        for i in range(3):
+            project = Project.objects.create(title=f'Project {i}')
+            ProjectImage.objects.create(project=project, image=f'projects/p{i}/0.jpg')
+        Achievement.objects.create(title='Hackathon winner', year=2024)
+        Participation.objects.create(event='Code Sprint', year=2023)
+        section = GallerySection.objects.create(title='Fest', slug='fest')
+        GalleryImage.objects.create(section=section, image='gallery/fest/a.jpg')
+
+    def setUp(self):
+        cache.clear()
+        forget_content_versions()
+        get_content_versions(*VERSIONED_MODELS)
+
+    def request(self, path='/'):
+        request = AsyncRequestFactory().get(path, secure=True)
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        return request
+
+    async def test_pages_render(self):
+        pages = [
+            (async_views.home, (), 'Project 2'),
+            (async_views.team, (), 'Ada'),
+            (async_views.projects, (), 'Project 1'),
+            (async_views.achievements, (), 'Code Sprint'),
+            (async_views.gallery_index, (), 'Fest'),
+            (async_views.gallery_projects, (), 'Project 0'),
+            (async_views.gallery_section, ('fest',), 'gallery/fest/a.jpg'),
+        ]
+        for view, args, text in pages:
+            with self.subTest(view=view.__name__):
+                response = await view(self.request(), *args)
+                self.assertContains(response, text)
+
+    def test_home_runs_the_same_queries_as_the_sync_view(self):
+        with CaptureQueriesContext(connection) as async_queries:
+            async_to_sync(async_views.home)(self.request())
+        cache.clear()
+        with CaptureQueriesContext(connection) as sync_queries:
+            views.home(self.request())
+        self.assertEqual(len(async_queries), HomePageQueryCountTests.HOME_QUERIES)
+        self.assertEqual(sorted(q['sql'] for q in async_queries), sorted(q['sql'] for q in sync_queries))
+        self.assertEqual(sorted(q['sql'] for q in async_queries), sorted(q['sql'] for q in sync_queries))
+
+    async def test_failed_section_degrades_the_page(self):
+        with mock.patch.object(views, 'timeline_years_querysets', side_effect=RuntimeError):
+            response = await async_views.achievements(self.request('/achievements/'))
+        self.assertContains(response, 'Hackathon winner')
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', response['Cache-Control'])
+
+    async def test_unknown_gallery_section_redirects(self):
+        response = await async_views.gallery_section(self.request(), 'nope')
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, CONTENT_VERSION_TTL=0)
+class ContentVersionTests(TestCase):
+    """Versions live in the database, so a bump from any process or function reaches every page cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(title='Old title')
+
+    def setUp(self):
+        cache.clear()
+        forget_content_versions()
+
+    def bump_elsewhere(self, model):
+        # what another worker or the Vercel auth function does on commit
+        ContentVersion.objects.filter(label=model._meta.label_lower).update(version=F('version') + 1)
+
+    def test_bump_from_another_process_reaches_cached_pages(self):
+        self.assertContains(self.client.get('/projects/', secure=True), 'Old title')
+        # no signals: only a version bump can invalidate the cached page
+        Project.objects.filter(pk=self.project.pk).update(title='New title')
+        self.assertContains(self.client.get('/projects/', secure=True), 'Old title')
+        self.bump_elsewhere(Project)
+        self.assertContains(self.client.get('/projects/', secure=True), 'New title')
+
+    def test_bump_from_another_process_changes_the_etag(self):
+        etag = self.client.get('/projects/', secure=True)['ETag']
+        self.assertEqual(self.client.get('/projects/', secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.bump_elsewhere(ProjectImage)
+        self.assertEqual(self.client.get('/projects/', secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(CONTENT_VERSION_TTL=60)
+    def test_own_bump_is_seen_before_the_ttl(self):
+        version = get_content_version(Project)
+        self.assertEqual(bump_content_version(Project), version + 1)
+        self.assertEqual(get_content_version(Project), version + 1)
+
+    @override_settings(CONTENT_VERSION_TTL=60)
+    def test_versions_are_read_once_per_ttl(self):
+        get_content_versions(*VERSIONED_MODELS)
+        with self.assertNumQueries(0):
+            get_content_versions(*VERSIONED_MODELS)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, CONTENT_VERSION_TTL=60)
+class PageCacheTests(TestCase):
+    """Edits show up on the next request, whichever process made them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(title='Old title')
+
+    def setUp(self):
+        cache.clear()
+        forget_content_versions()
+
+    def get(self, path='/projects/'):
+        return self.client.get(path, secure=True)
+
+    def test_save_invalidates_on_commit(self):
+        self.assertContains(self.get(), 'Old title')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.title = 'New title'
+            self.project.save()
+        # as another worker would see it once its CONTENT_VERSION_TTL is up
+        forget_content_versions()
+        self.assertContains(self.get(), 'New title')
+
+    def test_finished_image_job_invalidates(self):
+        image = ProjectImage.objects.create(project=self.project, image='projects/a.jpg')
+        job = ImageJob.objects.create(model_label='main.projectimage', object_id=image.pk,
+                                     field_name='image', file_name=image.image.name)
+        etag = self.get()['ETag']
+        jobs.mark_done(job)
+        forget_content_versions()
+        self.assertNotEqual(self.get()['ETag'], etag)
+
+    def test_degraded_page_is_not_cached(self):
+        with mock.patch.object(views, 'keyset_page', side_effect=RuntimeError):
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertContains(self.get(), 'Old title')
+
+
+class SiteSearchTests(TestCase):
+    """``/search/`` and the in-memory index that signals keep current."""
+
+    @classmethod
+    def setUpTestData(cls):
+        TeamMember.objects.create(name='Ada Lovelace', title='Engineer', bio='Writes the firmware')
+        Project.objects.create(title='Robot arm', description='A six-axis arm built by Ada')
+
+    def setUp(self):
+        cache.clear()
+        forget_content_versions()
+        fresh_index = mock.patch.object(site_search, '_index', site_search.SearchIndex())
+        fresh_index.start()
+        self.addCleanup(fresh_index.stop)
+
+    def titles(self, query):
+        return [doc.title for doc in site_search.search(query)]
+
+    def test_search_page(self):
+        response = self.client.get('/search/', {'q': 'lovel'}, secure=True)
+        self.assertContains(response, 'Ada Lovelace')
+        self.assertNotContains(response, 'Robot arm')
+        self.assertContains(self.client.get('/search/', {'q': 'zzz'}, secure=True), 'Nothing matches')
+
+    def test_search_json(self):
+        response = self.client.get('/search/', {'q': 'robot', 'format': 'json'}, secure=True)
+        self.assertEqual(response.json(), {'query': 'robot', 'results': [
+            {'kind': 'Project', 'title': 'Robot arm', 'subtitle': '', 'url': '/projects/'},
+        ]})
+
+    def test_prefix_matching(self):
+        # title matches rank first; every word must match some word's prefix
+        self.assertEqual(self.titles('ada'), ['Ada Lovelace', 'Robot arm'])
+        self.assertEqual(self.titles('ada firm'), ['Ada Lovelace'])
+        self.assertEqual(self.titles('ada firmwares'), [])
+        self.assertEqual(self.titles('a'), [])
+
+    def test_signals_update_the_index_in_place(self):
+        self.assertEqual(self.titles('solar'), [])
+        with mock.patch.object(site_search, 'build_index', side_effect=AssertionError('index rebuilt')):
+            with self.captureOnCommitCallbacks(execute=True):
+                project = Project.objects.create(title='Solar car')
+            self.assertEqual(self.titles('sol'), ['Solar car'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                project.title = 'Wind turbine'
+                project.save()
+            self.assertEqual(self.titles('sol'), [])
+            self.assertEqual(self.titles('turb'), ['Wind turbine'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                project.delete()
+            self.assertEqual(self.titles('turb'), [])
+
+    def test_change_from_another_process_rebuilds(self):
+        self.assertEqual(self.titles('robot'), ['Robot arm'])
+        # a direct UPDATE plus version bump, as another worker would leave it
+        Project.objects.update(title='Rover')
+        bump_content_version(Project)
+        self.assertEqual(self.titles('robot'), [])
+        self.assertEqual(self.titles('rov'), ['Rover'])
+
+
+class ImageDerivativeTests(TestCase):
+    """Derivative URLs come from the record the worker leaves on the row, not from storage."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = TeamMember.objects.create(name='Ada', photo='team/ada/photo.jpg')
+        self.job = ImageJob.objects.get(model_label='main.teammember', object_id=self.member.pk)
+        no_probes = mock.patch.object(default_storage, 'exists', side_effect=AssertionError('storage probed'))
+        no_probes.start()
+        self.addCleanup(no_probes.stop)
+
+    def test_unprocessed_image_uses_original(self):
+        self.assertEqual(images.derivative_url(self.member.photo, 'avatar'), '/media/team/ada/photo.jpg')
+        self.assertEqual(images.srcset(self.member.photo), '')
+        self.assertEqual(images.picture_sources(self.member.photo, 'avatar'), [])
+
+    def test_mark_done_records_derivatives(self):
+        with mock.patch.object(images, 'modern_formats', return_value=[images.MODERN_FORMATS[1]]):
+            jobs.mark_done(self.job)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.derivatives, {'team/ada/photo.jpg': ['.jpg', '.webp']})
+        photo = self.member.photo
+        self.assertEqual(images.derivative_url(photo, 'avatar'), '/media/team/ada/photo.avatar.jpg')
+        self.assertTrue(images.srcset(photo).endswith('/media/team/ada/photo.w1280.jpg 1280w'))
+        self.assertEqual(images.picture_sources(photo, 'avatar'), [('image/webp', '/media/team/ada/photo.avatar.webp')])
+
+    def test_replaced_upload_is_not_recorded(self):
+        self.member.photo = 'team/ada/new.jpg'
+        self.member.save()
+        jobs.mark_done(self.job)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.derivatives, {})
+
+    def test_team_page_renders_without_probing_storage(self):
+        jobs.mark_done(self.job)
+        forget_content_versions()
+        response = self.client.get('/team/', secure=True)
+        self.assertContains(response, '/media/team/ada/photo.avatar.jpg')
+
+
+class ImageStatusAdminTests(TestCase):
+    """The processing column comes from the change list query, not one lookup per row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_member(self, name, status=ImageJob.STATUS_DONE, error=''):
+        member = TeamMember.objects.create(name=name, title='Member', photo=f'team/{name}.jpg')
+        ImageJob.objects.filter(object_id=member.pk, model_label='main.teammember').delete()
+        ImageJob.objects.create(model_label='main.teammember', object_id=member.pk, field_name='photo',
+                                file_name=member.photo.name, status=status, last_error=error)
+        return member
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/main/teammember/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_status_of_latest_job(self):
+        member = self.add_member('ada', ImageJob.STATUS_FAILED, 'old error')
+        ImageJob.objects.create(model_label='main.teammember', object_id=member.pk, field_name='photo',
+                                file_name=member.photo.name, status=ImageJob.STATUS_FAILED,
+                                last_error='cannot identify image file')
+        response, _ = self.changelist_queries()
+        self.assertContains(response, 'Failed: cannot identify image file')
+        self.assertNotContains(response, 'old error')
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_member('ada')
+        self.changelist_queries()  # loads the content versions
+        _, one_row = self.changelist_queries()
+        for name in ['grace', 'linus', 'ken']:
+            self.add_member(name, ImageJob.STATUS_PENDING)
+        response, four_rows = self.changelist_queries()
+        self.assertContains(response, 'Pending', count=3)
+        self.assertEqual(four_rows, one_row)
+
+
+class LayoutFragmentTests(TestCase):
+    """The cached nav and footer are shared across pages and keyed on who is looking."""
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, path):
+        return self.client.get(path, secure=True)
+
+    def test_nav_marks_active_section_per_page(self):
+        self.assertContains(self.get('/team/'), 'data-section="team" class="active"')
+        response = self.get('/projects/')
+        self.assertContains(response, 'data-section="projects" class="active"')
+        self.assertNotContains(response, 'data-section="team" class="active"')
+        self.assertContains(self.get('/gallery/'), 'data-section="gallery" class="active"')
+
+    def test_nav_not_keyed_per_url(self):
+        with mock.patch('django.templatetags.cache.make_template_fragment_key',
+                        wraps=make_template_fragment_key) as make_key:
+            for path in ['/projects/', '/projects/?after=probe', '/projects/?utm_source=feed']:
+                self.get(path)
+        nav_keys = {tuple(call.args[1]) for call in make_key.call_args_list if call.args[0] == 'layout_nav'}
+        self.assertEqual(len(nav_keys), 1)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'checks SQLite query plans')
+class ListingQueryPlanTests(TestCase):
+    """Each listing query must read through its index instead of sorting (see migration 0009)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        section = GallerySection.objects.create(title='Fest', slug='fest')
+        GalleryImage.objects.create(section=section, image='gallery/fest/a.jpg')
+        TeamMember.objects.create(name='Member', email='member@example.com')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan.replace('COVERING INDEX', 'INDEX'))
+        self.assertNotIn('USE TEMP B-TREE', plan)
+
+    def test_team_members(self):
+        self.assertUsesIndex(TeamMember.objects.order_by('created_at'), 'teammember_created_idx')
+
+    def test_projects(self):
+        queryset = Project.objects.select_related('cover_image').order_by(*views.PROJECT_ORDERING)
+        self.assertUsesIndex(queryset, 'project_created_idx')
+
+    def test_timeline(self):
+        self.assertUsesIndex(Achievement.objects.order_by(*views.TIMELINE_ORDERING), 'achievement_year_idx')
+        self.assertUsesIndex(Participation.objects.order_by(*views.TIMELINE_ORDERING), 'participation_year_idx')
+
+    def test_gallery_sections(self):
+        self.assertUsesIndex(views.gallery_sections(), 'gallerysection_order_idx')
+
+    def test_gallery_images(self):
+        section = GallerySection.objects.get()
+        queryset = section.images.order_by(*views.GALLERY_IMAGE_ORDERING)
+        self.assertUsesIndex(queryset, 'galleryimage_section_order_idx')
+
+    def test_team_member_email(self):
+        queryset = TeamMember.objects.alias(email_lower=Lower('email')).filter(email_lower='member@example.com')
+        self.assertUsesIndex(queryset, 'teammember_email_lower_idx')
+
+
+@override_settings(REQUEST_METRICS_FLUSH_INTERVAL=3600)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_buffered_counts_reach_the_summary(self):
+        timings = metrics.RequestTimings(queries=3, db_ms=2.0, template_ms=4.0)
+        for total_ms in (4, 40, 400):
+            metrics.record('main:home', total_ms, timings, 1000)
+        # still buffered in this process; summary() flushes it first
+        self.assertIsNone(cache.get('metrics:%d:views' % metrics._window()))
+        [row] = metrics.summary()
+        self.assertEqual(row['view'], 'main:home')
+        self.assertEqual(row['count'], 3)
+        self.assertEqual(row['p50_ms'], 50)
+        self.assertEqual(row['max_queries'], 3)
+        self.assertEqual(row['avg_db_ms'], 2.0)
+        self.assertEqual(row['avg_size'], 1000)
+
+    def test_flushes_add_to_each_other(self):
+        timings = metrics.RequestTimings()
+        metrics.record('main:team', 10, timings, None)
+        metrics.flush()
+        metrics.record('main:team', 10, timings, None)
+        [row] = metrics.summary()
+        self.assertEqual(row['count'], 2)
+        self.assertEqual(row['avg_size'], 0)
+
+
+def _incr_many(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+def _add_once(location, results):
+    results.put(SQLiteCache(location, {}).add('winner', os.getpid()))
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+
+    def make_cache(self, **options):
+        cache = SQLiteCache(self.location, {'OPTIONS': options})
+        self.addCleanup(cache.close)
+        return cache
+
+    def run_processes(self, target, *args, count=4):
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=target, args=(self.location, *args)) for _ in range(count)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            self.assertEqual(process.exitcode, 0)
+
+    def test_incr_is_atomic_across_processes(self):
+        cache = self.make_cache()
+        cache.set('counter', 0)
+        self.run_processes(_incr_many, 250)
+        self.assertEqual(cache.get('counter'), 4 * 250)
+
+    def test_add_has_one_winner_across_processes(self):
+        self.make_cache().set('other', 1)
+        results = multiprocessing.get_context('fork').Queue()
+        self.run_processes(_add_once, results)
+        wins = [results.get(timeout=5) for _ in range(4)]
+        self.assertEqual(wins.count(True), 1)
+
+    def test_add_replaces_expired_entries(self):
+        cache = self.make_cache()
+        cache.set('key', 'old', -1)
+        self.assertTrue(cache.add('key', 'new'))
+        self.assertEqual(cache.get('key'), 'new')
+
+    def test_entries_are_bounded(self):
+        cache = self.make_cache(MAX_ENTRIES=50)
+        for i in range(5):
+            cache.set(f'expired:{i}', i, -1)
+        for i in range(CULL_CHECK_INTERVAL * 3 - 5):
+            cache.set(f'key:{i}', i)
+        count = cache._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        self.assertLessEqual(count, 50)
+        # expired rows go first, then the least recently used
+        self.assertEqual(cache._db.execute("SELECT COUNT(*) FROM cache WHERE key LIKE '%expired%'").fetchone()[0], 0)
+        self.assertIsNone(cache.get('key:0'))
+        self.assertEqual(cache.get(f'key:{CULL_CHECK_INTERVAL * 3 - 6}'), CULL_CHECK_INTERVAL * 3 - 6)
+
+    def test_close_closes_the_connection(self):
+        cache = self.make_cache()
+        cache.set('key', 1)
+        connection = cache._db
+        cache.close()
+        with self.assertRaises(Exception):
+            connection.execute('SELECT 1')
+        self.assertEqual(cache.get('key'), 1)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CONTACT_NOTIFY_EMAILS=['team@example.com'],
+    CONTACT_NOTIFY_ASYNC=True,
+)
+class ContactNotificationTests(TestCase):
+    BACKOFF = 60
+
+    def create_messages(self, count):
+        return [ContactMessage.objects.create(name=f'Sender {i}', email=f's{i}@example.com', message='Hello')
+                for i in range(count)]
+
+    def send(self, **kwargs):
+        kwargs.setdefault('backoff_seconds', self.BACKOFF)
+        return notifications.send_notifications(**kwargs)
+
+    def make_due(self):
+        ContactNotification.objects.update(run_after=timezone.now())
+
+    def test_saving_a_message_queues_a_notification(self):
+        self.create_messages(1)
+        self.assertEqual(ContactNotification.objects.get().status, ContactNotification.STATUS_PENDING)
+        self.assertEqual(mail.outbox, [])
+
+    def test_batch_is_sent_over_one_connection(self):
+        self.create_messages(3)
+        with mock.patch.object(notifications, 'get_connection', wraps=notifications.get_connection) as connect:
+            self.assertEqual(self.send(), (3, 0))
+        connect.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].to, ['team@example.com'])
+        self.assertEqual(sorted(m.reply_to[0] for m in mail.outbox),
+                         ['s0@example.com', 's1@example.com', 's2@example.com'])
+        self.assertFalse(ContactNotification.objects.exclude(status=ContactNotification.STATUS_SENT).exists())
+        self.assertEqual(self.send(), (0, 0))
+
+    def test_batch_size_limits_one_run(self):
+        self.create_messages(3)
+        self.assertEqual(self.send(batch_size=2), (2, 0))
+        self.assertEqual(self.send(batch_size=2), (1, 0))
+
+    def test_failed_send_is_retried_with_backoff(self):
+        self.create_messages(1)
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', side_effect=SMTPException('busy')):
+            start = timezone.now()
+            self.assertEqual(self.send(), (0, 1))
+            notification = ContactNotification.objects.get()
+            self.assertEqual((notification.status, notification.attempts), (ContactNotification.STATUS_PENDING, 1))
+            self.assertIn('busy', notification.last_error)
+            self.assertGreaterEqual(notification.run_after, start + timedelta(seconds=self.BACKOFF))
+            # not due yet
+            self.assertEqual(self.send(), (0, 0))
+
+            self.make_due()
+            start = timezone.now()
+            self.send()
+            notification.refresh_from_db()
+            self.assertEqual(notification.attempts, 2)
+            # the delay doubles with each attempt
+            self.assertGreaterEqual(notification.run_after, start + timedelta(seconds=2 * self.BACKOFF))
+            self.assertLess(notification.run_after, start + timedelta(seconds=3 * self.BACKOFF))
+
+        self.make_due()
+        self.assertEqual(self.send(), (1, 0))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), (ContactNotification.STATUS_SENT, 3))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_fails_for_good_after_max_attempts(self):
+        self.create_messages(1)
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', side_effect=SMTPException('rejected')):
+            self.send(max_attempts=2)
+            self.make_due()
+            self.send(max_attempts=2)
+        notification = ContactNotification.objects.get()
+        self.assertEqual((notification.status, notification.attempts), (ContactNotification.STATUS_FAILED, 2))
+        self.make_due()
+        self.assertEqual(self.send(max_attempts=2), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_one_bad_message_does_not_fail_the_batch(self):
+        first, second = self.create_messages(2)
+        send_messages = locmem.EmailBackend.send_messages
+
+        def fail_first(backend, messages):
+            if messages[0].reply_to == [first.email]:
+                raise SMTPException('rejected')
+            return send_messages(backend, messages)
+
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', fail_first):
+            self.assertEqual(self.send(), (1, 1))
+        self.assertEqual([m.reply_to for m in mail.outbox], [[second.email]])
+        self.assertEqual(ContactNotification.objects.get(message=first).status, ContactNotification.STATUS_PENDING)
+
+    def test_connection_error_reschedules_the_whole_batch(self):
+        self.create_messages(2)
+        with mock.patch.object(locmem.EmailBackend, 'open', side_effect=SMTPException('down')):
+            self.assertEqual(self.send(), (0, 2))
+        self.assertEqual(
+            list(ContactNotification.objects.values_list('status', 'attempts')),
+            [(ContactNotification.STATUS_PENDING, 1)] * 2,
+        )
+
+    @override_settings(CONTACT_NOTIFY_ASYNC=False)
+    def test_sync_mode_sends_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_messages(1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(ContactNotification.objects.get().status, ContactNotification.STATUS_SENT)
+
+
+@override_settings(CONTACT_NOTIFY_EMAILS=['team@example.com'], CONTACT_NOTIFY_ASYNC=True)
+class InboxAdminTests(TestCase):
+    """Bulk actions on the contact inbox: streamed exports, one-UPDATE read flags, range deletes."""
+    CHANGELIST = '/admin/main/contactmessage/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        cls.messages = [
+            ContactMessage.objects.create(name='Ada', email='ada@example.com', message='=HYPERLINK("x")'),
+            ContactMessage.objects.create(name='Grace', email='grace@example.com', message='Hello', read=True),
+            ContactMessage.objects.create(name='Linus', email='linus@example.com', message='Hi'),
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def action(self, action, messages):
+        return self.client.post(self.CHANGELIST, {
+            'action': action, '_selected_action': [m.pk for m in messages],
+        }, secure=True)
+
+    def content(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_csv_streams_selected_rows(self):
+        response = self.action('export_csv', self.messages[:2])
+        self.assertIn('attachment; filename="contact-messages-', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        self.assertEqual(rows[0], list(inbox.EXPORT_FIELDS))
+        self.assertEqual([row[1] for row in rows[1:]], ['Ada', 'Grace'])
+        # formulas are neutralised for spreadsheet apps
+        self.assertEqual(rows[1][5], '\'=HYPERLINK("x")')
+        self.assertEqual([row[4] for row in rows[1:]], ['False', 'True'])
+
+    def test_export_ndjson_streams_selected_rows(self):
+        response = self.action('export_ndjson', self.messages[1:])
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([(row['id'], row['name'], row['read']) for row in rows],
+                         [(self.messages[1].pk, 'Grace', True), (self.messages[2].pk, 'Linus', False)])
+
+    def test_set_read_is_one_update(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(inbox.set_read(ContactMessage.objects.all(), True), 2)
+        self.assertFalse(ContactMessage.objects.filter(read=False).exists())
+
+    def test_mark_actions_update_in_one_statement(self):
+        selected = ContactMessage.objects.filter(pk__in=[m.pk for m in self.messages[:2]])
+        for action, read in [('mark_read', True), ('mark_unread', False)]:
+            with CaptureQueriesContext(connection) as queries:
+                self.action(action, self.messages[:2])
+            updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "main_contactmessage"')]
+            self.assertEqual(len(updates), 1)
+            self.assertEqual(selected.filter(read=read).count(), 2)
+
+    def test_delete_range(self):
+        day = timezone.now().date() - timedelta(days=10)
+        for offset, message in enumerate(self.messages):
+            ContactMessage.objects.filter(pk=message.pk).update(created_at=timezone.now() - timedelta(days=10 - offset))
+        form = {'start': day.isoformat(), 'end': (day + timedelta(days=1)).isoformat()}
+        response = self.client.post(self.CHANGELIST + 'delete-range/', form, secure=True)
+        self.assertEqual(response.context['count'], 2)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+
+        response = self.client.post(self.CHANGELIST + 'delete-range/', {**form, 'read_only': 'on', 'confirm': '1'},
+                                    secure=True)
+        self.assertRedirects(response, self.CHANGELIST, fetch_redirect_response=False)
+        self.assertEqual(sorted(ContactMessage.objects.values_list('name', flat=True)), ['Ada', 'Linus'])
+
+        self.client.post(self.CHANGELIST + 'delete-range/', {**form, 'confirm': '1'}, secure=True)
+        self.assertEqual(list(ContactMessage.objects.values_list('name', flat=True)), ['Linus'])
+        self.assertEqual(list(ContactNotification.objects.values_list('message__name', flat=True)), ['Linus'])
+
+    def test_delete_messages_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(inbox.delete_messages(ContactMessage.objects.all(), batch_size=2), 3)
+        deletes = [q['sql'] for q in queries if q['sql'].startswith('DELETE FROM "main_contactmessage"')]
+        self.assertEqual(len(deletes), 2)
+        self.assertFalse(ContactMessage.objects.exists())
+        self.assertFalse(ContactNotification.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'checks the SQLite FTS5 index')
+class InboxSearchTests(TestCase):
+    """The FTS5 index follows every write to the inbox and ranks name matches first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        # not example.com, whose tokens the exam* prefix queries would match
+        cls.jane = ContactMessage.objects.create(name='Jane Doe', email='jane@mail.org',
+                                                 message='A question about the examination')
+        cls.bob = ContactMessage.objects.create(name='Bob', email='bob@mail.org',
+                                                message='Jane told me to write about the exam')
+
+    def setUp(self):
+        if inbox_search.backend() is None:
+            self.skipTest('SQLite was built without FTS5')
+
+    def search(self, term):
+        return list(inbox_search.search_messages(ContactMessage.objects.all(), term).order_by('pk'))
+
+    def test_insert_is_indexed(self):
+        message = ContactMessage.objects.create(name='Ada', email='ada@mail.org', message='Sponsorship')
+        self.assertEqual(self.search('sponsor'), [message])
+        # every word must match, each as a prefix
+        self.assertEqual(self.search('jan exam'), [self.jane, self.bob])
+        self.assertEqual(self.search('jan examination'), [self.jane])
+
+    def test_updates_and_deletes_are_indexed(self):
+        # a bulk update never sends signals; the triggers still see it
+        ContactMessage.objects.filter(pk=self.bob.pk).update(message='Robotics workshop')
+        self.assertEqual(self.search('workshop'), [self.bob])
+        self.assertEqual(self.search('exam'), [self.jane])
+        self.jane.delete()
+        self.assertEqual(self.search('exam'), [])
+
+    def test_admin_search_ranks_name_matches_first(self):
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin/main/contactmessage/', {'q': 'jane'}, secure=True)
+        self.assertEqual(list(response.context['cl'].result_list), [self.jane, self.bob])
+        response = self.client.get('/admin/main/contactmessage/', {'q': 'jane', 'o': '1'}, secure=True)
+        self.assertEqual([m.name for m in response.context['cl'].result_list], ['Bob', 'Jane Doe'])
+
+    def test_rebuild_command_backfills_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {inbox_search.FTS_TABLE} ({inbox_search.FTS_TABLE}) VALUES ('delete-all')")
+        self.assertEqual(self.search('exam'), [])
+        out = io.StringIO()
+        call_command('rebuild_contact_search', stdout=out)
+        self.assertIn('indexed 2 message(s) (sqlite)', out.getvalue())
+        self.assertEqual(self.search('exam'), [self.jane, self.bob])
+
+
+@override_settings(
+    RATE_LIMIT_ENABLED=True,
+    RATE_LIMIT_PROXY_HOPS=0,
+    RATE_LIMITS={'contact': (3, 60), 'login': (3, 60), 'signup': (3, 60)},
+)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        clock = mock.patch.object(ratelimit, 'time', mock.Mock(time=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def post(self, path, ip='203.0.113.1', **data):
+        return self.client.post(path, data, secure=True, REMOTE_ADDR=ip)
+
+    def contact(self, ip='203.0.113.1', email='ada@example.com'):
+        return self.post('/contact/', ip, name='Ada', email=email, message='Hello')
+
+    def test_burst_then_429(self):
+        for _ in range(3):
+            self.assertEqual(self.contact().status_code, 302)
+        response = self.contact()
+        self.assertEqual(response.status_code, 429)
+        # one token refills every 20 seconds
+        self.assertEqual(response['Retry-After'], '21')
+        self.assertEqual(ContactMessage.objects.count(), 3)
+
+    def test_bucket_refills_over_time(self):
+        for _ in range(3):
+            self.contact()
+        self.now += 10
+        self.assertEqual(self.contact().status_code, 429)
+        self.now += 20
+        self.assertEqual(self.contact().status_code, 302)
+        self.assertEqual(self.contact().status_code, 429)
+        self.now += 60
+        for _ in range(3):
+            self.assertEqual(self.contact().status_code, 302)
+
+    def test_ips_have_separate_buckets(self):
+        for i in range(3):
+            self.contact(email=f'user{i}@example.com')
+        self.assertEqual(self.contact(email='other@example.com').status_code, 429)
+        self.assertEqual(self.contact(ip='198.51.100.7', email='other@example.com').status_code, 302)
+
+    def test_emails_have_separate_buckets(self):
+        for i in range(3):
+            self.contact(ip=f'198.51.100.{i}')
+        # a fresh IP cannot get around the email's bucket
+        self.assertEqual(self.contact(ip='198.51.100.9').status_code, 429)
+        self.assertEqual(self.contact(ip='198.51.100.10', email='grace@example.com').status_code, 302)
+
+    def test_scopes_have_separate_buckets(self):
+        for _ in range(3):
+            self.contact()
+        self.assertEqual(self.post('/login/', email='ada@example.com', password='x').status_code, 200)
+
+    def test_rejected_contact_post_never_touches_the_database(self):
+        for _ in range(3):
+            self.contact()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.contact().status_code, 429)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+
+    def test_rejected_login_never_authenticates(self):
+        with mock.patch.object(views, 'authenticate', return_value=None) as authenticate:
+            for _ in range(3):
+                self.post('/login/', email='ada@example.com', password='wrong')
+            self.assertEqual(authenticate.call_count, 3)
+            with self.assertNumQueries(0):
+                response = self.post('/login/', email='ada@example.com', password='wrong')
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(authenticate.call_count, 3)
+
+    def test_rejections_are_counted_per_scope(self):
+        for _ in range(5):
+            self.contact()
+        self.post('/signup/')
+        self.assertEqual(ratelimit.rejection_counts(), {'contact': 2, 'login': 0, 'signup': 0})
+
+    def test_get_requests_are_not_limited(self):
+        for _ in range(3):
+            self.contact()
+        self.assertEqual(self.client.get('/contact/', secure=True, REMOTE_ADDR='203.0.113.1').status_code, 200)
+
+    @override_settings(RATE_LIMIT_PROXY_HOPS=1)
+    def test_forged_forwarded_for_entries_are_ignored(self):
+        for i in range(4):
+            response = self.client.post('/contact/', {'name': 'Ada', 'email': f'u{i}@example.com', 'message': 'Hi'},
+                                        secure=True, REMOTE_ADDR='10.0.0.1',
+                                        HTTP_X_FORWARDED_FOR=f'192.0.2.{i}, 203.0.113.1')
+        self.assertEqual(response.status_code, 429)
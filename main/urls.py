@@ -1,20 +1,34 @@
+from django.conf import settings
+from django.contrib.sitemaps import views as sitemap_views
 from django.urls import path
-from . import views
+from . import async_views, views
+from .cache import versioned_page
+from .sitemaps import SITEMAPS, SITEMAP_MODELS
 
 app_name = 'main'
 
+# read-only pages run as async views under ASGI (see crusaders_project/asgi.py)
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', read_views.home, name='home'),
     path('about/', views.about, name='about'),
-    path('team/', views.team, name='team'),
-    path('projects/', views.projects, name='projects'),
+    path('team/', read_views.team, name='team'),
+    path('projects/', read_views.projects, name='projects'),
     path('contact/', views.contact, name='contact'),
-    path('achievements/', views.achievements, name='achievements'),
-    path('gallery/', views.gallery_index, name='gallery_index'),
-    path('gallery/projects/', views.gallery_projects, name='gallery_projects'),
-    path('gallery/<slug:slug>/', views.gallery_section, name='gallery_section'),
+    path('achievements/', read_views.achievements, name='achievements'),
+    path('gallery/', read_views.gallery_index, name='gallery_index'),
+    path('gallery/projects/', read_views.gallery_projects, name='gallery_projects'),
+    path('gallery/<slug:slug>/', read_views.gallery_section, name='gallery_section'),
+    path('gallery/<slug:slug>/images/', views.gallery_section_images, name='gallery_section_images'),
+    path('search/', views.search, name='search'),
     path('studio/', views.studio, name='studio'),
     path('login/', views.auth_login, name='login'),
     path('signup/', views.auth_signup, name='signup'),
     path('profile/', views.profile, name='profile'),
+    # sitemap index plus one sitemap per section, paginated past 50k URLs
+    path('sitemap.xml', versioned_page(*SITEMAP_MODELS)(sitemap_views.index),
+         {'sitemaps': SITEMAPS, 'sitemap_url_name': 'main:sitemap_section'}, name='sitemap'),
+    path('sitemap-<section>.xml', versioned_page(*SITEMAP_MODELS)(sitemap_views.sitemap),
+         {'sitemaps': SITEMAPS}, name='sitemap_section'),
 ]
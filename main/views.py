@@ -1,7 +1,6 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.decorators import login_required
-from django.conf import settings
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib import messages
@@ -9,7 +8,37 @@ from django import forms
 from django.contrib.auth.models import User
 from .models import TeamMember
 from .models import GallerySection, Project, Achievement, Participation, ContactMessage
+from .models import GalleryImage, ProjectImage
+from .cache import mark_page_degraded, read_through, versioned_page
 from django.urls import reverse
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from .images import derivative_url, picture_sources
+from .pagination import keyset_page
+from .ratelimit import rate_limited, rejection_counts
+from .roles import is_privileged, resolve_role
+from . import metrics
+from . import search as site_search
+
+
+# Gallery sections are paged by (order, created_at, id) to match GalleryImage.Meta.ordering
+GALLERY_PAGE_SIZE = 24
+GALLERY_IMAGE_ORDERING = ('order', 'created_at', 'id')
+
+# Listing pages are keyset-paginated newest first
+PROJECTS_PAGE_SIZE = 24
+PROJECT_ORDERING = ('-created_at', '-id')
+TIMELINE_PAGE_SIZE = 50
+TIMELINE_ORDERING = ('-year', '-id')
+
+# Site search results per query
+SEARCH_RESULTS_LIMIT = 30
+SEARCH_QUERY_MAX_LENGTH = 100
+
+# Models behind the home page's cached data bundle
+HOME_MODELS = (TeamMember, Project, ProjectImage, Achievement, Participation)
 
 
 # Custom forms
@@ -26,31 +55,29 @@ class SignupForm(UserCreationForm):
         fields = ('username', 'email', 'password1', 'password2')
 
 
-def home(request):
-    # Render the original single-page home (index.html) with all sections
+def evaluate(queryset):
+    """Evaluate `queryset`, falling back to an empty list if the tables are unavailable."""
     try:
-        team_members = list(TeamMember.objects.all().order_by('created_at'))
+        return list(queryset)
     except:
-        team_members = []
-    
-    try:
-        projects = list(Project.objects.all().order_by('-created_at')[:8])
-    except:
-        projects = []
-    
-    try:
-        achievements = list(Achievement.objects.all().order_by('-year')[:8])
-    except:
-        achievements = []
-    
-    try:
-        participations = list(Participation.objects.all().order_by('-year')[:8])
-    except:
-        participations = []
-    
+        mark_page_degraded()
+        return []
+
+
+def home_querysets():
+    """The independent queries behind the home page."""
+    return {
+        'team_members': TeamMember.objects.all().order_by('created_at'),
+        'projects': Project.objects.select_related('cover_image').order_by('-created_at')[:8],
+        'achievements': Achievement.objects.all().order_by('-year')[:8],
+        'participations': Participation.objects.all().order_by('-year')[:8],
+    }
+
+
+def home_context(request, team_members, projects, achievements, participations):
     # show a quick success flag if contact was just submitted
     contact_sent = request.GET.get('contact') == '1'
-    return render(request, 'index.html', {
+    return {
         'team_members': team_members,
         'projects': projects,
         'achievements': achievements,
@@ -59,9 +86,28 @@ def home(request):
         'page_title': 'Coding Crusaders - Creative Web Development & Design',
         'page_description': 'Explore the portfolio of Coding Crusaders - a team of talented developers and designers creating fluid, interactive web experiences.',
         'page_keywords': 'web development, design, animation, interactive experiences, portfolio, coding',
-    })
+    }
 
 
+def home_bundle():
+    """The home page's query results, shared through the cache (see cache.read_through)."""
+    try:
+        # a failed query must raise here, so the empty fallback is never cached
+        return read_through('home', HOME_MODELS, lambda: {
+            name: list(qs) for name, qs in home_querysets().items()
+        })
+    except:
+        mark_page_degraded()
+        return {name: [] for name in home_querysets()}
+
+
+@versioned_page(*HOME_MODELS)
+def home(request):
+    # Render the original single-page home (index.html) with all sections
+    return render(request, 'index.html', home_context(request, **home_bundle()))
+
+
+@versioned_page()
 def about(request):
     return render(request, 'about.html', {
         'page_title': 'About Coding Crusaders - Our Team & Vision',
@@ -70,32 +116,58 @@ def about(request):
     })
 
 
-def team(request):
-    try:
-        team_members = list(TeamMember.objects.all().order_by('created_at'))
-    except:
-        team_members = []
-    return render(request, 'team.html', {
+def team_queryset():
+    return TeamMember.objects.all().order_by('created_at')
+
+
+def team_context(request, team_members=None):
+    if team_members is None:
+        team_members = evaluate(team_queryset())
+    return {
         'team_members': team_members,
         'page_title': 'Our Team - Coding Crusaders',
         'page_description': 'Meet the talented developers and designers behind Coding Crusaders. Learn about each team member and their expertise.',
         'page_keywords': 'team members, developers, designers, web developers, creative team, portfolio',
-    })
+    }
 
 
-def projects(request):
-    try:
-        projects = list(Project.objects.all().order_by('-created_at'))
-    except:
-        projects = []
-    return render(request, 'projects.html', {
+@versioned_page(TeamMember)
+def team(request):
+    return render(request, 'team.html', team_context(request))
+
+
+def projects_queryset():
+    return Project.objects.select_related('cover_image')
+
+
+def projects_context(request, page=None):
+    """`page` is the ``(projects, next_cursor)`` result; queried here when omitted."""
+    cursor = request.GET.get('after')
+    if page is None:
+        try:
+            page = keyset_page(projects_queryset(), PROJECT_ORDERING, cursor, PROJECTS_PAGE_SIZE)
+        except:
+            mark_page_degraded()
+            page = ([], None)
+    projects, next_cursor = page
+    return {
         'projects': projects,
+        'first_page': not cursor,
+        # the first page features its newest four projects above the grid
+        'grid_projects': projects if cursor else projects[4:],
+        'next_cursor': next_cursor,
         'page_title': 'Our Projects - Coding Crusaders Portfolio',
         'page_description': 'Explore our portfolio of innovative web development projects, featuring interactive experiences and creative design solutions.',
         'page_keywords': 'projects, portfolio, web development projects, case studies, design work, interactive websites',
-    })
+    }
 
 
+@versioned_page(Project, ProjectImage)
+def projects(request):
+    return render(request, 'projects.html', projects_context(request))
+
+
+@rate_limited('contact')
 def contact(request):
     # Accept POST from the contact page form and persist a ContactMessage
     if request.method == 'POST':
@@ -104,7 +176,9 @@ def contact(request):
         subject = request.POST.get('subject', '').strip()
         message_text = request.POST.get('message', '').strip()
         if name and email and message_text:
-            ContactMessage.objects.create(name=name, email=email, message=message_text)
+            # the notification email is queued in the same transaction (see main/notifications.py)
+            with transaction.atomic():
+                ContactMessage.objects.create(name=name, email=email, message=message_text)
             messages.success(request, "Thank you! We've received your message and will get back to you soon.")
             return redirect('main:contact')
     return render(request, 'contact.html', {
@@ -114,86 +188,237 @@ def contact(request):
     })
 
 
-def achievements(request):
+def _parse_year(value):
     try:
-        achievements = list(Achievement.objects.all().order_by('-year'))
-    except:
-        achievements = []
-    try:
-        participations = list(Participation.objects.all().order_by('-year'))
-    except:
-        participations = []
-    return render(request, 'achievements.html', {
+        year = int(value)
+    except (TypeError, ValueError):
+        return None
+    return year if 1900 <= year <= 9999 else None
+
+
+def selected_year(request):
+    return _parse_year(request.GET.get('year'))
+
+
+def achievements_querysets(year):
+    """``(achievements, participations)`` for the timeline, filtered to `year` if given."""
+    achievement_qs = Achievement.objects.all()
+    participation_qs = Participation.objects.all()
+    if year:
+        achievement_qs = achievement_qs.filter(year=year)
+        participation_qs = participation_qs.filter(year=year)
+    return achievement_qs, participation_qs
+
+
+def timeline_years_querysets():
+    return (Participation.objects.values_list('year', flat=True).distinct(),
+            Achievement.objects.exclude(year=None).values_list('year', flat=True).distinct())
+
+
+# fallbacks for a timeline section or the year filter whose queries failed
+EMPTY_TIMELINE = ([], None, 0)
+NO_YEARS = ()
+
+
+def achievements_context(request, achievements_section=None, participations_section=None, years=None):
+    """Each section is ``(items, next_cursor, total count)``; the parts not passed are queried here."""
+    year = selected_year(request)
+    achievement_qs, participation_qs = achievements_querysets(year)
+    if achievements_section is None:
+        try:
+            achievements_section = (*keyset_page(achievement_qs, TIMELINE_ORDERING,
+                                                 request.GET.get('achievements_after'), TIMELINE_PAGE_SIZE),
+                                    achievement_qs.count())
+        except:
+            mark_page_degraded()
+            achievements_section = EMPTY_TIMELINE
+    if participations_section is None:
+        try:
+            participations_section = (*keyset_page(participation_qs, TIMELINE_ORDERING,
+                                                   request.GET.get('participations_after'), TIMELINE_PAGE_SIZE),
+                                      participation_qs.count())
+        except:
+            mark_page_degraded()
+            participations_section = EMPTY_TIMELINE
+    if years is None:
+        try:
+            years = set().union(*(set(qs) for qs in timeline_years_querysets()))
+        except:
+            mark_page_degraded()
+            years = NO_YEARS
+    achievements, next_achievements, achievement_count = achievements_section
+    participations, next_participations, participation_count = participations_section
+    years = sorted(years, reverse=True)
+    return {
         'achievements': achievements,
         'participations': participations,
+        'achievement_count': achievement_count,
+        'participation_count': participation_count,
+        'next_achievements': next_achievements,
+        'next_participations': next_participations,
+        'years': years,
+        'selected_year': year,
         'page_title': 'Achievements & Awards - Coding Crusaders',
         'page_description': 'Discover the achievements, awards, and event participations of the Coding Crusaders team in web development and design.',
         'page_keywords': 'achievements, awards, events, competitions, recognitions, hackathons, web development awards',
-    })
+    }
 
 
-def gallery_index(request):
-    try:
-        sections = list(GallerySection.objects.prefetch_related('images').all())
-    except:
-        sections = []
-    return render(request, 'gallery_index.html', {
+@versioned_page(Achievement, Participation)
+def achievements(request):
+    return render(request, 'achievements.html', achievements_context(request))
+
+
+def gallery_sections():
+    """Sections in display order with their image counts.
+
+    The count is a correlated subquery rather than ``Count('images')``: a
+    GROUP BY would stop the database from reading the sections in
+    gallerysection_order_idx order.
+    """
+    image_count = (GalleryImage.objects.filter(section=OuterRef('pk')).order_by()
+                   .values('section').annotate(n=Count('pk')).values('n'))
+    return GallerySection.objects.select_related('cover_image').annotate(
+        image_count=Coalesce(Subquery(image_count, output_field=IntegerField()), 0),
+    )
+
+
+def gallery_index_context(request, sections=None):
+    if sections is None:
+        sections = evaluate(gallery_sections())
+    return {
         'sections': sections,
         'page_title': 'Gallery - Coding Crusaders',
         'page_description': 'Browse the photo gallery showcasing our team, events, and creative work at Coding Crusaders.',
         'page_keywords': 'gallery, photos, events, team photos, creative work, portfolio gallery',
-    })
+    }
 
 
-def gallery_projects(request):
-    # show projects with their images grouped
-    try:
-        projects = list(Project.objects.prefetch_related('images').all())
-    except:
-        projects = []
-    return render(request, 'gallery_projects.html', {
+@versioned_page(GallerySection, GalleryImage)
+def gallery_index(request):
+    return render(request, 'gallery_index.html', gallery_index_context(request))
+
+
+def gallery_projects_queryset():
+    # projects with their images grouped
+    return Project.objects.prefetch_related('images').all()
+
+
+def gallery_projects_context(request, projects=None):
+    if projects is None:
+        projects = evaluate(gallery_projects_queryset())
+    return {
         'projects': projects,
         'page_title': 'Project Gallery - Coding Crusaders',
         'page_description': 'Explore our project gallery showcasing the visual work, designs, and creative implementations from our portfolio.',
         'page_keywords': 'project gallery, portfolio, project images, design work, creative projects, web development portfolio',
-    })
+    }
 
 
-def gallery_section(request, slug):
-    try:
-        section = GallerySection.objects.prefetch_related('images').filter(slug=slug).first()
-        if section:
-            images = list(section.images.all())
-        else:
-            images = []
-            section = None
-    except:
-        section = None
-        images = []
-    
+@versioned_page(Project, ProjectImage)
+def gallery_projects(request):
+    return render(request, 'gallery_projects.html', gallery_projects_context(request))
+
+
+def _gallery_images_url(slug, cursor):
+    if not cursor:
+        return ''
+    return f"{reverse('main:gallery_section_images', args=[slug])}?cursor={cursor}"
+
+
+def gallery_section_queryset(slug):
+    return GallerySection.objects.annotate(image_count=Count('images')).filter(slug=slug)
+
+
+def gallery_section_context(request, slug, section_page=None):
+    """Context for one gallery section, or None when the slug is unknown.
+
+    `section_page` is ``(section, images, next_cursor)``; queried here when omitted.
+    """
+    if section_page is None:
+        try:
+            section = gallery_section_queryset(slug).first()
+            images, next_cursor = [], None
+            if section:
+                images, next_cursor = keyset_page(section.images.all(), GALLERY_IMAGE_ORDERING,
+                                                  request.GET.get('cursor'), GALLERY_PAGE_SIZE)
+            section_page = (section, images, next_cursor)
+        except:
+            mark_page_degraded()
+            section_page = (None, [], None)
+    section, images, next_cursor = section_page
     if not section:
-        return redirect('main:gallery_index')
-    
-    return render(request, 'gallery_section.html', {
+        return None
+
+    return {
         'section': section,
         'images': images,
+        'next_cursor': next_cursor,
+        'next_page_url': _gallery_images_url(section.slug, next_cursor),
         'page_title': f'{section.title} - Coding Crusaders Gallery' if section else 'Gallery - Coding Crusaders',
         'page_description': f'{section.description}' if section else 'Browse our photo gallery.',
         'page_keywords': f'gallery, {section.title.lower()}, photos, events' if section else 'gallery, photos',
+    }
+
+
+@versioned_page(GallerySection, GalleryImage)
+def gallery_section(request, slug):
+    context = gallery_section_context(request, slug)
+    if context is None:
+        return redirect('main:gallery_index')
+    return render(request, 'gallery_section.html', context)
+
+
+@versioned_page(GallerySection, GalleryImage)
+def gallery_section_images(request, slug):
+    """JSON page of a section's images, used by the gallery's infinite scroll."""
+    section = GallerySection.objects.filter(slug=slug).first()
+    if not section:
+        return JsonResponse({'error': 'Gallery section not found'}, status=404)
+    images, next_cursor = keyset_page(section.images.all(), GALLERY_IMAGE_ORDERING,
+                                      request.GET.get('cursor'), GALLERY_PAGE_SIZE)
+    return JsonResponse({
+        'images': [
+            {
+                'url': img.image.url,
+                'thumb': derivative_url(img.image, 'tile'),
+                'sources': [{'type': mime, 'srcset': value} for mime, value in picture_sources(img.image, 'tile')],
+                'caption': img.caption,
+                'alt': img.caption or section.title,
+            }
+            for img in images
+        ],
+        'next': _gallery_images_url(section.slug, next_cursor) or None,
     })
 
 
-def _is_privileged_user(u):
-    if not u or not getattr(u, 'is_authenticated', False):
-        return False
-    if getattr(u, 'is_staff', False) or getattr(u, 'is_superuser', False):
-        return True
-    allowed = getattr(settings, 'ADMIN_ALLOWED_EMAILS', []) or []
-    email = getattr(u, 'email', '') or ''
-    return email.lower() in [s.lower() for s in allowed]
+def search(request):
+    """Site search across team, projects, achievements and galleries; ``?format=json`` for type-ahead."""
+    query = request.GET.get('q', '').strip()[:SEARCH_QUERY_MAX_LENGTH]
+    results = []
+    if query:
+        try:
+            results = site_search.search(query, SEARCH_RESULTS_LIMIT)
+        except Exception:
+            results = []
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'query': query,
+            'results': [
+                {'kind': doc.kind, 'title': doc.title, 'subtitle': doc.subtitle, 'url': doc.url}
+                for doc in results
+            ],
+        })
+    return render(request, 'search.html', {
+        'query': query,
+        'results': results,
+        'page_title': f'Search: {query} - Coding Crusaders' if query else 'Search - Coding Crusaders',
+        'page_description': 'Search Coding Crusaders team members, projects, achievements and galleries.',
+        'page_keywords': 'search, team, projects, achievements, gallery',
+    })
 
 
-@user_passes_test(_is_privileged_user)
+@user_passes_test(is_privileged)
 def studio(request):
     """Protected simple studio dashboard linking to admin change lists.
 
@@ -201,12 +426,15 @@ def studio(request):
     included in `settings.ADMIN_ALLOWED_EMAILS`.
     """
     return render(request, 'studio.html', {
+        'request_metrics': metrics.summary() if metrics.metrics_enabled() else None,
+        'rate_limit_rejections': rejection_counts(),
         'page_title': 'Studio - Coding Crusaders',
         'page_description': 'Coding Crusaders Studio - Content management and administration dashboard.',
         'page_keywords': 'studio, admin, dashboard, content management',
     })
 
 
+@rate_limited('login')
 def auth_login(request):
     """Simple login view that accepts email (or username) + password.
 
@@ -249,6 +477,7 @@ def auth_login(request):
     })
 
 
+@rate_limited('signup')
 def auth_signup(request):
     """Signup view: normal signup form plus 'Sign up with Google' link."""
     if request.user.is_authenticated:
@@ -284,41 +513,19 @@ def auth_signup(request):
 def profile(request):
     """Show a simple profile page for the current user.
 
-    Role resolution:
+    Role resolution (see main/roles.py):
     - Team Leader: user.is_superuser or user.is_staff
-    - Team Member: a TeamMember exists whose name contains the user's username or first name
+    - Team Member: a TeamMember exists with the user's email
     - Other: default
     """
     user = request.user
-    role = 'Other'
-    tag_class = 'other'
-    # Team leader (staff/superuser or registered privileged email)
-    if getattr(user, 'is_superuser', False) or getattr(user, 'is_staff', False):
-        role = 'Team Leader'
-        tag_class = 'leader'
-    else:
-        # Only consider a user a Team Member when there is a TeamMember with an exact email match
-        team_member = None
-        if user.email:
-            team_member = TeamMember.objects.filter(email__iexact=user.email).first()
-        if team_member:
-            role = 'Team Member'
-            tag_class = 'member'
-        else:
-            role = 'Other'
-            tag_class = 'other'
-
-    # ensure team_member variable exists (may be None)
-    try:
-        team_member
-    except NameError:
-        team_member = None
+    user_role = resolve_role(user)
 
     return render(request, 'profile.html', {
         'profile_user': user,
-        'role': role,
-        'tag_class': tag_class,
-        'team_member': team_member,
+        'role': user_role.label,
+        'tag_class': user_role.role,
+        'team_member': user_role.team_member,
         'page_title': 'My Profile - Coding Crusaders',
         'page_description': 'View and manage your Coding Crusaders profile.',
         'page_keywords': 'profile, account, user profile, settings',
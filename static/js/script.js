@@ -289,56 +289,144 @@ document.querySelectorAll('a[href^="#"]').forEach(a=>{
     }
   });
   
-  // Load more functionality: reveal images in batches to avoid long initial render
+  // Load more functionality: reveal images in batches to avoid long initial render,
+  // then pull further pages from the section's JSON endpoint as the user scrolls
   (function(){
     const grid = document.querySelector('.gallery-grid');
     if(!grid) return;
     const items = Array.from(grid.querySelectorAll('.gallery-item'));
     const pageSize = 12;
+    const placeholder = "data:image/svg+xml;utf8,<svg xmlns='http://www.w3.org/2000/svg' width='10' height='10'><rect width='100%' height='100%' fill='%23071023'/></svg>";
     let visible = 0;
+    let nextUrl = grid.getAttribute('data-next-url');
+    let loading = false;
+    let observer = null;
     
-    function showNextBatch(){
-      const next = items.slice(visible, visible + pageSize);
-      next.forEach(it => { 
-        it.style.display = 'block'; 
-        // Load image when visible
-        const img = it.querySelector('img'); 
-        if(img){
-          const src = img.getAttribute('data-src') || img.src;
-          if(src && src.startsWith('data:')) {
-            // Has placeholder, try to load real image
-            const realSrc = img.getAttribute('data-src');
-            if(realSrc) {
-              img.src = realSrc;
-              img.onload = function() {
-                img.classList.add('loaded');
-                img.onload = null;
-              };
-            }
-          } else if(src) {
-            // Already has real src, ensure it loads
-            img.src = src;
+    function loadImage(it){
+      it.style.display = 'block'; 
+      // Load image when visible
+      const img = it.querySelector('img'); 
+      if(img){
+        // Modern-format <source>s are lazy too; swap them in before the <img>
+        const picture = img.closest('picture');
+        if(picture){
+          picture.querySelectorAll('source[data-srcset]').forEach(source => {
+            source.srcset = source.getAttribute('data-srcset');
+            source.removeAttribute('data-srcset');
+          });
+        }
+        const src = img.getAttribute('data-src') || img.src;
+        if(src && src.startsWith('data:')) {
+          // Has placeholder, try to load real image
+          const realSrc = img.getAttribute('data-src');
+          if(realSrc) {
+            img.src = realSrc;
             img.onload = function() {
               img.classList.add('loaded');
               img.onload = null;
             };
           }
-          img.removeAttribute('data-src');
+        } else if(src) {
+          // Already has real src, ensure it loads
+          img.src = src;
+          img.onload = function() {
+            img.classList.add('loaded');
+            img.onload = null;
+          };
         }
+        img.removeAttribute('data-src');
+      }
+    }
+    
+    // Build a tile matching gallery_section.html from one JSON image entry
+    function buildItem(data){
+      const figure = document.createElement('figure');
+      figure.className = 'gallery-item glass';
+      figure.style.display = 'none';
+      const link = document.createElement('a');
+      link.className = 'gallery-link';
+      link.href = data.url;
+      link.setAttribute('data-caption', data.caption || '');
+      const picture = document.createElement('picture');
+      (data.sources || []).forEach(s => {
+        const source = document.createElement('source');
+        source.type = s.type;
+        source.setAttribute('data-srcset', s.srcset);
+        picture.appendChild(source);
       });
-      visible += next.length;
-      if(visible >= items.length){
+      const img = document.createElement('img');
+      img.className = 'gallery-image';
+      img.alt = data.alt || '';
+      img.loading = 'lazy';
+      img.src = placeholder;
+      img.setAttribute('data-src', data.thumb);
+      picture.appendChild(img);
+      link.appendChild(picture);
+      const overlay = grid.querySelector('.image-overlay');
+      if(overlay) link.appendChild(overlay.cloneNode(true));
+      figure.appendChild(link);
+      if(data.caption){
+        const caption = document.createElement('figcaption');
+        caption.className = 'image-caption';
+        caption.textContent = data.caption;
+        figure.appendChild(caption);
+      }
+      return figure;
+    }
+    
+    function fetchNextPage(){
+      if(!nextUrl || loading) return Promise.resolve();
+      loading = true;
+      return fetch(nextUrl, { headers: { 'Accept': 'application/json' } })
+        .then(res => res.ok ? res.json() : Promise.reject(res.status))
+        .then(data => {
+          (data.images || []).forEach(entry => {
+            const it = buildItem(entry);
+            grid.appendChild(it);
+            items.push(it);
+          });
+          nextUrl = data.next;
+        })
+        .catch(() => {})
+        .finally(() => { loading = false; });
+    }
+    
+    function finishIfDone(){
+      if(visible >= items.length && !nextUrl){
         const btnWrap = document.querySelector('.gallery-loadmore'); 
         if(btnWrap) btnWrap.remove();
+        if(observer) observer.disconnect();
       }
     }
     
+    function showNextBatch(){
+      if(visible >= items.length){
+        if(nextUrl && !loading){
+          fetchNextPage().then(() => { if(visible < items.length) showNextBatch(); else finishIfDone(); });
+        }
+        return;
+      }
+      const next = items.slice(visible, visible + pageSize);
+      next.forEach(loadImage);
+      visible += next.length;
+      finishIfDone();
+      // Re-arm the observer so a pager that is still on screen triggers again
+      if(observer){
+        const wrap = document.querySelector('.gallery-loadmore');
+        if(wrap){ observer.unobserve(wrap); observer.observe(wrap); }
+      }
+    }
+    
+    // The server-rendered pager is a no-JS fallback; replace it with ours
+    const serverPager = document.querySelector('.gallery-loadmore');
+    if(serverPager) serverPager.remove();
+    
     // Hide all initially except first batch
     items.forEach(it => it.style.display = 'none');
     showNextBatch();
     
     // Add "Load more" button if needed
-    if(items.length > visible){
+    if(items.length > visible || nextUrl){
       const wrap = document.createElement('div'); 
       wrap.className = 'gallery-loadmore';
       const btn = document.createElement('a'); 
@@ -348,6 +436,14 @@ document.querySelectorAll('a[href^="#"]').forEach(a=>{
       btn.addEventListener('click', (e)=>{ e.preventDefault(); showNextBatch(); });
       wrap.appendChild(btn);
       grid.parentNode.insertBefore(wrap, grid.nextSibling);
+      
+      // Infinite scroll: load the next batch as the pager approaches the viewport
+      if('IntersectionObserver' in window){
+        observer = new IntersectionObserver(entries => {
+          if(entries.some(entry => entry.isIntersecting)) showNextBatch();
+        }, { rootMargin: '400px 0px' });
+        observer.observe(wrap);
+      }
     }
   })();
 })();